@@ -0,0 +1,99 @@
+import asyncio
+import io
+import multiprocessing
+import os
+from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import numpy as np
+
+from create_report import create_report
+from wagon_columns import is_columnar
+
+# Cancel flags of the render slots, shared with the worker processes of an AsyncReportRenderer
+_cancel_flags = None
+
+
+def _init_worker(cancel_flags) -> None:
+    global _cancel_flags
+    _cancel_flags = cancel_flags
+
+
+def _render_report(slot: int, wagon_values: list[dict] | int, info_values: dict, repeat_header: bool, fillable: bool) -> bytes:
+    buffer = io.BytesIO()
+    if not create_report(buffer, wagon_values, info_values, repeat_header, fillable=fillable, cancelled=lambda: _cancel_flags[slot]):
+        return b""
+    return buffer.getvalue()
+
+
+class AsyncReportRenderer:
+    """Create reports from asyncio code without blocking the event loop.
+
+    The reports are rendered on a pool of worker processes. At most max_concurrency reports are rendered at the same time, further
+    requests wait in line for a free worker. Cancelling a request that is waiting removes it from the line, cancelling a request
+    that is being rendered stops its worker at the next page.
+
+        async with AsyncReportRenderer(max_concurrency=4) as renderer:
+            pdf_bytes = await renderer.create_report(wagon_values, info_values)
+
+    Args:
+        max_concurrency (int, optional): Number of reports rendered at the same time, which is also the number of worker processes.
+            Defaults to the number of CPUs.
+    """
+
+    def __init__(self, max_concurrency: int | None = None) -> None:
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self._cancel_flags = multiprocessing.Array("b", self.max_concurrency, lock=False)
+        self._executor = ProcessPoolExecutor(self.max_concurrency, initializer=_init_worker, initargs=(self._cancel_flags,))
+        self._free_slots = list(range(self.max_concurrency))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def create_report(
+        self,
+        wagon_values: Iterable[dict] | Mapping[str, Sequence] | np.ndarray | int,
+        info_values: dict,
+        repeat_header: bool = True,
+        fillable: bool = True,
+    ) -> bytes:
+        """Create a report in a worker process and return the PDF content.
+
+        Takes the same values as create_report_bytes. Empty bytes are returned when no report could be created.
+        """
+        # Columns are sent to the worker as they are and checked there
+        if not isinstance(wagon_values, int) and not is_columnar(wagon_values):
+            wagon_values = list(wagon_values)
+
+        loop = asyncio.get_running_loop()
+        await self._semaphore.acquire()
+        slot = self._free_slots.pop()
+        self._cancel_flags[slot] = 0
+
+        def release(future: Future) -> None:
+            # A cancelled render keeps its slot until its worker has stopped, so the next render does not see its cancel flag
+            self._free_slots.append(slot)
+            self._semaphore.release()
+
+        try:
+            future = self._executor.submit(_render_report, slot, wagon_values, info_values, repeat_header, fillable)
+        except BaseException:
+            release(None)
+            raise
+        future.add_done_callback(lambda future: loop.call_soon_threadsafe(release, future))
+
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            self._cancel_flags[slot] = 1
+            raise
+
+    def close(self) -> None:
+        """Stop the worker processes. Waiting requests are cancelled, running ones are stopped at their next page."""
+        for slot in range(self.max_concurrency):
+            self._cancel_flags[slot] = 1
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def __aenter__(self) -> "AsyncReportRenderer":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
@@ -0,0 +1,109 @@
+"""Create reports from a stream of jobs in JSON Lines format.
+
+Every input line is a job with the arguments of create_report, e.g.
+
+    {"filename": "report_1.pdf", "wagons": [{"Wagen": "31 80 4556 123-4", ...}], "info": {"Ort": "Salzburg"}, "repeat_header": true}
+
+wagons may also be a number of empty rows or an object with a list of values per key, info and repeat_header may be omitted. For every
+job one JSON line with its status, its timings and the size of the output is printed, in the order of the input.
+
+    python batch.py jobs.jsonl
+    cat jobs.jsonl | python batch.py --workers 8 > results.jsonl
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+
+
+def run_job(line_number: int, line: str) -> dict:
+    """Create the report of one input line and describe the outcome. Never raises, failures are reported in the result."""
+    # Imported here so that the command starts without loading reportlab, the workers import it once each
+    from create_report import create_report
+
+    start = time.perf_counter()
+    result = {"line": line_number, "filename": None, "status": "error"}
+    try:
+        job = json.loads(line)
+        filename = job["filename"] if job["filename"].endswith(".pdf") else job["filename"] + ".pdf"
+        result["filename"] = filename
+        if create_report(filename, job["wagons"], job.get("info", {}), job.get("repeat_header", True)):
+            result.update(status="ok", output_bytes=os.path.getsize(filename))
+        else:
+            result["error"] = "No report created, see the log"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["wall_time"] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def read_jobs(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+    """Numbered non-empty lines of the input, read one at a time."""
+    for line_number, line in enumerate(lines, 1):
+        if line.strip():
+            yield line_number, line
+
+
+def run_batch(lines: Iterable[str], workers: int | None = None, max_pending: int | None = None) -> Iterator[dict]:
+    """Create the reports of a stream of JSON lines on a process pool.
+
+    Only a bounded number of jobs is read ahead of the finished ones, so inputs of any length are processed with constant memory.
+
+    Args:
+        lines (Iterable[str]): JSON lines, one job each. Empty lines are skipped.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs. With 1 the reports are created in this process.
+        max_pending (int, optional): Number of jobs submitted but not yet reported. Defaults to four per worker.
+
+    Yields:
+        dict: One result per job, in the order of the input.
+
+    """
+    jobs = read_jobs(lines)
+    if workers == 1:
+        for line_number, line in jobs:
+            yield run_job(line_number, line)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 4 * workers
+    pending: deque[Future] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for line_number, line in jobs:
+            pending.append(executor.submit(run_job, line_number, line))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Create reports from jobs in JSON Lines format.")
+    parser.add_argument("jobs", nargs="?", default="-", help="File with one job per line. Standard input when not given or -.")
+    parser.add_argument("--workers", type=int, help="Number of worker processes. Defaults to the number of CPUs.")
+    parser.add_argument("--max-pending", type=int, help="Jobs read ahead of the finished ones. Defaults to four per worker.")
+    args = parser.parse_args()
+
+    # Standard output carries the results only, the log of the reports goes to standard error
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s", stream=sys.stderr)
+
+    failed = 0
+    jobs = sys.stdin if args.jobs == "-" else open(args.jobs)
+    with jobs:
+        for result in run_batch(jobs, args.workers, args.max_pending):
+            failed += result["status"] != "ok"
+            print(json.dumps(result), flush=True)
+
+    if failed:
+        logging.error(f"{failed} jobs failed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""Benchmark the report generation.
+
+Renders the scenarios of main.py and reports with a growing number of wagons, with and without repeated header, and records the wall
+time, the peak memory, the size of the output, the number of pages and the number of form widgets of every case in a JSON file.
+With --workers every case is also rendered in parts on that many processes, see the workers argument of create_report.
+
+    python benchmark.py --output results.json
+    python benchmark.py --output new.json --compare results.json
+    python benchmark.py --scenarios wagons_1000 --workers 4
+"""
+
+import argparse
+import io
+import itertools
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import datetime, timezone
+
+from pdfrw import PdfName, PdfReader
+
+from create_report import create_report
+from test_values import info_values, wagon_values
+
+default_scales = [1, 10, 100, 1000, 10000]
+
+
+def get_scenarios(scales: list[int]) -> dict[str, Callable[[], tuple]]:
+    """Scenarios by name. Every scenario returns the wagon values and the info values of the report."""
+    scenarios = {
+        "wagon_values": lambda: (wagon_values, info_values),
+        "empty_100": lambda: (100, {}),
+        "one_wagon": lambda: (wagon_values[:1], info_values),
+        "many_wagons": lambda: (wagon_values * 10, info_values),
+    }
+    for scale in scales:
+        scenarios[f"wagons_{scale}"] = lambda scale=scale: (list(itertools.islice(itertools.cycle(wagon_values), scale)), info_values)
+    return scenarios
+
+
+def count_pages_and_widgets(pdf_data: bytes) -> tuple[int, int]:
+    pdf = PdfReader(fdata=pdf_data)
+    widgets = sum(1 for page in pdf.pages for annotation in page.Annots or [] if annotation.Subtype == PdfName.Widget)
+    return len(pdf.pages), widgets
+
+
+def run_case(scenario: Callable[[], tuple], repeat_header: bool, repeat: int = 1, measure_memory: bool = True, workers: int | None = None) -> dict:
+    """Render one case and measure it. The wall time is the best of the repetitions, the memory is measured in a separate run.
+
+    With workers only the memory of this process is measured, which is the memory of the merge.
+    """
+    wall_times = []
+    for _ in range(repeat):
+        wagons, info = scenario()
+        output = io.BytesIO()
+        start = time.perf_counter()
+        create_report(output, wagons, info, repeat_header=repeat_header, workers=workers)
+        wall_times.append(time.perf_counter() - start)
+
+    peak_memory = None
+    if measure_memory:
+        # tracemalloc slows the rendering down, so it is kept out of the timed runs
+        wagons, info = scenario()
+        tracemalloc.start()
+        create_report(io.BytesIO(), wagons, info, repeat_header=repeat_header, workers=workers)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    pages, widgets = count_pages_and_widgets(output.getvalue())
+    return {
+        "wall_time": min(wall_times),
+        "peak_memory": peak_memory,
+        "output_bytes": len(output.getvalue()),
+        "pages": pages,
+        "widgets": widgets,
+    }
+
+
+def run_benchmarks(
+    scales: list[int] = default_scales,
+    repeat: int = 1,
+    measure_memory: bool = True,
+    only: list[str] | None = None,
+    workers: int | None = None,
+) -> dict:
+    """Run every scenario with repeat_header on and off.
+
+    Args:
+        scales (list[int], optional): Number of wagons of the scaled scenarios.
+        repeat (int, optional): Number of timed runs of every case, the best one is kept.
+        measure_memory (bool, optional): Measure the peak memory of every case in an additional run.
+        only (list[str], optional): Names of the scenarios to run. All when not given.
+        workers (int, optional): Also run every case on this many processes, as case "<case>/workers_<workers>". Its result has the
+            speedup over the case rendered in one piece.
+
+    Returns:
+        dict: Machine and run information and the results of every case by name.
+
+    """
+    results = {}
+    for name, scenario in get_scenarios(scales).items():
+        if only and name not in only:
+            continue
+        for repeat_header in (True, False):
+            case = f"{name}/{'header' if repeat_header else 'no_header'}"
+            results[case] = run_case(scenario, repeat_header, repeat, measure_memory)
+            print_result(case, results[case])
+            if workers is not None:
+                parallel_case = f"{case}/workers_{workers}"
+                results[parallel_case] = run_case(scenario, repeat_header, repeat, measure_memory, workers)
+                results[parallel_case]["speedup"] = results[case]["wall_time"] / results[parallel_case]["wall_time"]
+                print_result(parallel_case, results[parallel_case])
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def print_result(case: str, result: dict) -> None:
+    memory = f"{result['peak_memory'] / 2**20:8.1f} MiB" if result["peak_memory"] is not None else "       - MiB"
+    speedup = f" {result['speedup']:5.2f}x" if "speedup" in result else ""
+    print(
+        f"{case:38} {result['wall_time']:9.3f} s {memory} {result['output_bytes']:>11} B {result['pages']:>6} pages {result['widgets']:>7} widgets"
+        f"{speedup}"
+    )
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.1) -> list[str]:
+    """Compare two benchmark runs.
+
+    Args:
+        baseline (dict): Stored results of run_benchmarks.
+        current (dict): New results of run_benchmarks.
+        threshold (float, optional): Allowed relative increase of the wall time, the peak memory and the output size, and allowed
+            relative decrease of the speedup of the cases with workers.
+
+    Returns:
+        list[str]: One message per regression. Empty when there are none.
+
+    """
+    regressions = []
+    for case, result in current["results"].items():
+        if case not in baseline["results"]:
+            continue
+        reference = baseline["results"][case]
+        for metric in ("wall_time", "peak_memory", "output_bytes"):
+            old, new = reference.get(metric), result.get(metric)
+            if old and new is not None and new > old * (1 + threshold):
+                regressions.append(f"{case}: {metric} {old:.6g} -> {new:.6g} (+{(new / old - 1) * 100:.1f}%)")
+        old, new = reference.get("speedup"), result.get("speedup")
+        if old and new is not None and new < old * (1 - threshold):
+            regressions.append(f"{case}: speedup {old:.3g} -> {new:.3g}")
+        for metric in ("pages", "widgets"):
+            if reference.get(metric) != result.get(metric):
+                regressions.append(f"{case}: {metric} changed {reference.get(metric)} -> {result.get(metric)}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the report generation.")
+    parser.add_argument("--output", default="benchmark_results.json", help="File that receives the results.")
+    parser.add_argument("--compare", help="Results of a previous run. Regressions against it are reported and make the exit code 1.")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Allowed relative increase before a metric is a regression.")
+    parser.add_argument("--scales", type=int, nargs="+", default=default_scales, help="Number of wagons of the scaled scenarios.")
+    parser.add_argument("--scenarios", nargs="+", help="Only run these scenarios, e.g. many_wagons wagons_1000.")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs of every case, the best one is kept.")
+    parser.add_argument("--skip-memory", action="store_true", help="Do not measure the peak memory.")
+    parser.add_argument("--workers", type=int, help="Also render every case on this many processes and report the speedup.")
+    args = parser.parse_args()
+
+    # The benchmark reports its own progress
+    logging.disable(logging.INFO)
+
+    current = run_benchmarks(args.scales, args.repeat, not args.skip_memory, args.scenarios, args.workers)
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, current, args.threshold)
+        for regression in regressions:
+            logging.error(f"Regression {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
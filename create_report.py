@@ -1,48 +1,34 @@
 # Import color
-import copy
+import io
+import itertools
 import logging
-import os
+import time
+from collections.abc import Callable, Iterable, Mapping, Sequence, Sized
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, NamedTuple
 
-from pdfrw import PdfDict, PdfObject, PdfReader, PdfWriter
+import numpy as np
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import ParagraphStyle
 from reportlab.pdfgen import canvas
-from reportlab.platypus import Paragraph
 
 from global_vars import (
-    A4_height,
-    A4_width,
-    bottom_margin,
-    dict_font_description_style,
-    dict_font_header_1_value_style,
-    dict_font_title_style,
-    dict_text_field_header_value_params,
+    dict_col_params,
     dict_text_field_table_params,
-    frame_description_height,
-    frame_dict_font_description_style,
-    frame_style,
-    frame_value_style,
-    header_1_col_1_width,
-    header_1_col_2_width,
-    header_1_title_width,
-    hosx,
-    hosy,
-    left_margin,
+    list_mass_keys,
     list_value_names,
     list_wagon_necessary_keys,
-    min_height_header_1,
-    moyd,
-    no_padding_frame_params,
-    right_margin,
-    solid_black_line_params,
-    top_margin,
-    transparent_frame_params,
+    sum_label_key,
 )
+from layout import PageLayout, PagePlan, plan_header_layout, plan_page_layout, plan_pages
+from masses import MassTotals, mass_rows, sum_masses
+from pdf_writer import IncrementalPdfWriter, PdfRecording
+from report_stats import ReportStats, phase
 from utils import (
-    FrameComposite,
+    add_text_field,
     create_line,
-    create_matrix,
+    install_acroform,
 )
+from wagon_columns import is_columnar, wagon_columns
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
@@ -62,7 +48,8 @@ def get_treated_values(info_values: dict) -> dict:
             dict_treated_values[key] = ""
 
     date = info_values.get("date", ["", "", ""])
-    sum_masses = info_values.get("Sum_masses", ["", "", ""])
+    # Without given sums the Sum line shows the sums of the wagon masses
+    sum_masses = info_values.get("Sum_masses")
 
     dict_treated_values["Sum_masses"] = sum_masses
 
@@ -70,11 +57,24 @@ def get_treated_values(info_values: dict) -> dict:
     return dict_treated_values
 
 
-def create_report(filename: str, wagon_values: list[dict] | int, info_values: dict, repeat_header: bool = True) -> int:
+def create_report(
+    filename: str | BinaryIO,
+    wagon_values: Iterable[dict] | Mapping[str, Sequence] | np.ndarray | int,
+    info_values: dict,
+    repeat_header: bool = True,
+    flush_pages: bool = False,
+    progress: Callable[[int], None] | None = None,
+    fillable: bool = True,
+    stats: ReportStats | None = None,
+    workers: int | None = None,
+    cancelled: Callable[[], bool] | None = None,
+    page_totals: bool = False,
+) -> int:
     """Create a report with the given values.
 
     Args:
-        wagon_values (list[dict]): List of wagons with the following keys or a integer. When integer is given, the report table will contain this number of empty rows.
+        wagon_values (Iterable[dict]): List of wagons with the following keys or a integer. When integer is given, the report table will contain this number of empty rows.
+            Any iterable or generator (e.g. rows from a database cursor) can be given, wagons are consumed one page at a time.
             - Wagen: str
             - BezDG (Bezeichnung des Gutes): str
             - NHM: str
@@ -84,6 +84,10 @@ def create_report(filename: str, wagon_values: list[dict] | int, info_values: di
             - TaraWagon: str
             - BruttoMasse: str
 
+            The wagons may also be given column by column, as a dict with a sequence of values for every key or as a NumPy
+            structured array with fields of these names, see wagon_columns. The columns are checked before anything is rendered
+            and the values are read from them by index.
+
         info_values (dict): Dictionary with the following keys. When a list is given, each element will be separated by a line break.
 
             - Versandbahnhof_1: str or list of str
@@ -95,817 +99,458 @@ def create_report(filename: str, wagon_values: list[dict] | int, info_values: di
             - Versand_Nr: str
             - Land: str
             - date: List with three values. eg. ["09", "03", "08"]
-            - Sum_masses: List with three values. eg. ["560 380", "158 430", "718 810"]
+            - Sum_masses: List with three values. eg. ["560 380", "158 430", "718 810"]. When not given, the sums of the NettoMasse,
+              TaraWagon and BruttoMasse of the wagons are shown. A sum is left empty when no wagon has a value or a value is not a number.
             - Absender: str or list of str
             - Empfänger: str or list of str
             - Zu_verzollen_in: str or list of str
             - Begleiter: str or list of str
 
 
-        filename (str, optional): Name of the report.
+        filename (str | BinaryIO): Name of the report or a writable binary stream (e.g. io.BytesIO or an open file) that receives the PDF.
+
+        repeat_header (bool, optional): Draw the header on every page instead of only on the first one.
+
+        flush_pages (bool, optional): Large report mode. Every finished page is written to the output right away, so the memory used
+            is bounded by one page plus the document index instead of growing with the number of pages. This costs time: every page
+            is parsed and formatted again on its way to the output, which makes the report two to three times slower to create.
+            Use it when memory matters more than time, e.g. for reports with many thousands of wagons.
+
+        progress (Callable[[int], None], optional): Called with the number of bytes written so far after every page in large report mode.
+
+        fillable (bool, optional): Put the values in form fields that can be edited. When False the values are drawn as plain page text,
+            which gives a much smaller file without form fields, suitable for archival copies.
+
+        stats (ReportStats, optional): Receives the duration of every phase and page, the number of frames and paragraphs drawn into
+            the page skeletons and the number of fields put on the pages. Nothing is measured when not given. With workers only the planning, the merge and the number of pages
+            are measured, the rendering happens in the worker processes.
+
+        workers (int, optional): Render consecutive ranges of pages of the report on this many processes and merge them into one
+            document, with the same content as when the report is rendered in one piece. The workers render and format their parts,
+            the merge only appends the formatted objects, so the time shrinks with the number of free CPUs for reports with
+            thousands of wagons. The wagons are read into memory first.
+
+        cancelled (Callable[[], bool], optional): Checked before every page. When it returns True the report is abandoned and 0 is
+            returned. When the report is written to a file, large report mode and workers leave no partial file behind.
+
+        page_totals (bool, optional): End every page with the sums of the masses of its wagons and, on all but the last page, the sums
+            of the wagons so far, carried forward to the next page. The last page ends with the Sum line as usual.
 
     """
-    if not filename.endswith(".pdf"):
-        filename += ".pdf"
-        logging.warning(f"Filename must end with .pdf. Changed to {filename}")
+    filename = report_filename(filename)
 
     if isinstance(wagon_values, int):
         empty_wagon = {key: "" for key in list_wagon_necessary_keys}
 
-        wagon_values = [empty_wagon] * wagon_values
+        wagon_values = itertools.repeat(empty_wagon, wagon_values)
+    elif is_columnar(wagon_values):
+        wagon_values = wagon_columns(wagon_values)
+        if wagon_values is None:
+            return 0
 
     dict_treated_values = get_treated_values(info_values)
 
-    return _create_report(filename, wagon_values, dict_treated_values, repeat_header)
-
+    if workers is not None and workers > 1:
+        return _create_report_parallel(
+            filename, wagon_values, dict_treated_values, repeat_header, workers, progress, fillable, stats, cancelled, page_totals
+        )
+    return _create_report(
+        filename, wagon_values, dict_treated_values, repeat_header, flush_pages, progress, fillable, stats, cancelled, page_totals=page_totals
+    )
 
-def _create_report(filename: str, wagon_values: list[dict], dict_treated_values: dict, repeat_header: bool = True) -> int:
-    c = canvas.Canvas("temporary.pdf", pagesize=A4)
 
-    wagon_values = copy.deepcopy(wagon_values)
+def report_filename(filename: str | BinaryIO) -> str | BinaryIO:
+    """Name of the report with the .pdf suffix, which is added with a warning when missing. Streams are returned as they are."""
+    if isinstance(filename, str) and not filename.endswith(".pdf"):
+        filename += ".pdf"
+        logging.warning(f"Filename must end with .pdf. Changed to {filename}")
+    return filename
 
-    if len(wagon_values) == 0:
-        logging.error("No wagons to create the report")
-        return 0
 
-    last_idx_last_page = 0
-    is_last_page = False
-    count_item = 0
-    while len(wagon_values) > 0:
-        dfs: dict[str, FrameComposite] = {}
-        dfs["main_frame"] = FrameComposite(
-            c,
-            left_margin,
-            A4_width - right_margin,
-            bottom_margin,
-            A4_height - top_margin,
-            (1, 0, 0),
-            1,
-        )
+def write_report(filename: str | BinaryIO, pdf_data: bytes) -> None:
+    """Write the content of a finished report to a file or a writable binary stream."""
+    if isinstance(filename, str):
+        with open(filename, "wb") as f:
+            f.write(pdf_data)
+        logging.info(f"File created: {filename}")
+    else:
+        filename.write(pdf_data)
 
-        must_add_header = repeat_header or last_idx_last_page == 0
-
-        if must_add_header:
-            frame_description_text = "Versandbahnhof"
-
-            frame_description_position = {
-                "start_x": hosx,
-                "end_x": header_1_col_1_width,
-                "start_y": hosy,
-                "end_y": frame_description_height + hosy,
-            }
-
-            frame_description_name = "Versandbahnhof_1_description"
-
-            dfs[frame_description_name] = dfs["main_frame"].add_frame(
-                c,
-                **frame_description_position,
-                **frame_dict_font_description_style,
-            )
-
-            dfs[frame_description_name].frame_container.frame.add(
-                Paragraph(frame_description_text, style=ParagraphStyle(**dict_font_description_style)),
-                c,
-            )
-
-            frame_value_text = dict_treated_values["Versandbahnhof_1"]
-            text_value_style = dict_font_header_1_value_style
-            p = Paragraph(frame_value_text, style=ParagraphStyle(**text_value_style))
-            p.wrap(header_1_col_1_width, 1e6)
-            lines_necessary = max(1, (len(p.getActualLineWidths0())))
-
-            frame_value_height = 1.3 * text_value_style["fontSize"] * lines_necessary
-
-            frame_height = max(min_height_header_1, frame_value_height) + frame_description_height + hosy
-
-            start_y = 0
-            end_y = frame_height
-
-            frame_position = {
-                "start_x": 0,
-                "end_x": header_1_col_1_width,
-                "start_y": start_y,
-                "end_y": end_y,
-            }
-
-            dfs["Versandbahnhof_1_frame"] = dfs["main_frame"].add_frame(
-                c,
-                **frame_position,
-                **frame_style,
-            )
-
-            end_y = dfs["Versandbahnhof_1_frame"].end_y - hosy
-
-            start_y = end_y - frame_value_height
-
-            frame_value_position = {
-                "start_x": hosx,
-                "end_x": header_1_col_1_width,
-                "start_y": start_y,
-                "end_y": end_y,
-            }
-
-            dfs["Versandbahnhof_1_value"] = dfs["main_frame"].add_frame(
-                c,
-                **frame_value_position,
-                **frame_value_style,
-            )
-
-            c.acroForm.textfield(
-                name="Versandbahnhof_1_value",
-                value=frame_value_text.replace("<br/>", "\n"),
-                x=dfs["Versandbahnhof_1_value"].frame_container.start_x,
-                y=dfs["Versandbahnhof_1_value"].frame_container.start_y,
-                width=dfs["Versandbahnhof_1_value"].frame_container.width,
-                height=dfs["Versandbahnhof_1_value"].frame_container.height,
-                **dict_text_field_header_value_params,
-            )
-
-            frame_description_text = "Versandbahnhof"
-
-            start_y = hosy + dfs["Versandbahnhof_1_frame"].end_y
-            end_y = start_y + frame_description_height
-
-            frame_description_position = {
-                "start_x": hosx,
-                "end_x": header_1_col_1_width,
-                "start_y": start_y,
-                "end_y": end_y,
-            }
-
-            dfs["Versandbahnhof_2_description"] = dfs["main_frame"].add_frame(
-                c,
-                **frame_description_position,
-                **frame_dict_font_description_style,
-            )
-
-            dfs["Versandbahnhof_2_description"].frame_container.frame.add(
-                Paragraph(frame_description_text, style=ParagraphStyle(**dict_font_description_style)),
-                c,
-            )
-
-            frame_value_text = dict_treated_values["Versandbahnhof_2"]
-            text_value_style = dict_font_header_1_value_style
-            p = Paragraph(frame_value_text, style=ParagraphStyle(**text_value_style))
-            p.wrap(header_1_col_1_width, 1e6)
-            lines_necessary = max(1, (len(p.getActualLineWidths0())))
-
-            frame_value_height = 1.3 * text_value_style["fontSize"] * lines_necessary
-
-            frame_height = max(min_height_header_1, frame_value_height) + frame_description_height + hosy
-
-            start_y = dfs["Versandbahnhof_1_frame"].end_y
-            end_y = start_y + frame_height
-
-            frame_position = {
-                "start_x": 0,
-                "end_x": header_1_col_1_width,
-                "start_y": start_y,
-                "end_y": end_y,
-            }
-
-            dfs["Versandbahnhof_2_frame"] = dfs["main_frame"].add_frame(
-                c,
-                **frame_position,
-                **frame_style,
-            )
-
-            end_y = dfs["Versandbahnhof_2_frame"].end_y - hosy
-            start_y = end_y - frame_value_height
-
-            frame_value_position = {
-                "start_x": hosx,
-                "end_x": header_1_col_1_width,
-                "start_y": start_y,
-                "end_y": end_y,
-            }
-
-            dfs["Versandbahnhof_2_value"] = dfs["main_frame"].add_frame(
-                c,
-                **frame_value_position,
-                **frame_value_style,
-            )
-
-            c.acroForm.textfield(
-                name="Versandbahnhof_2_value",
-                value=frame_value_text.replace("<br/>", "\n"),
-                x=dfs["Versandbahnhof_2_value"].frame_container.start_x,
-                y=dfs["Versandbahnhof_2_value"].frame_container.start_y,
-                width=dfs["Versandbahnhof_2_value"].frame_container.width,
-                height=dfs["Versandbahnhof_2_value"].frame_container.height,
-                **dict_text_field_header_value_params,
-            )
-
-            frame_description_text = "Leitungswege"
-
-            start_y = hosy + dfs["Versandbahnhof_2_frame"].end_y
-            end_y = start_y + frame_description_height
-
-            frame_description_position = {
-                "start_x": hosx,
-                "end_x": header_1_col_1_width,
-                "start_y": start_y,
-                "end_y": end_y,
-            }
-
-            frame_description_name = "Leitungswege_frame_description"
-
-            dfs[frame_description_name] = dfs["main_frame"].add_frame(
-                c,
-                **frame_description_position,
-                **frame_dict_font_description_style,
-            )
-
-            dfs[frame_description_name].frame_container.frame.add(
-                Paragraph(frame_description_text, style=ParagraphStyle(**dict_font_description_style)),
-                c,
-            )
-
-            frame_value_text = dict_treated_values["Leitungswege"]
-            text_value_style = dict_font_header_1_value_style
-            p = Paragraph(frame_value_text, style=ParagraphStyle(**text_value_style))
-            p.wrap(header_1_col_1_width, 1e6)
-            lines_necessary = max(1, 1, len(p.getActualLineWidths0()))
-
-            frame_value_height = 1.3 * text_value_style["fontSize"] * lines_necessary
-
-            frame_height = max(min_height_header_1, frame_value_height) + frame_description_height + hosy
-
-            start_y = dfs["Versandbahnhof_2_frame"].end_y
-            end_y = start_y + frame_height
-
-            frame_position = {
-                "start_x": 0,
-                "end_x": header_1_col_1_width,
-                "start_y": start_y,
-                "end_y": end_y,
-            }
-
-            dfs["Leitungswege_frame"] = dfs["main_frame"].add_frame(
-                c,
-                **frame_position,
-                **frame_style,
-            )
-
-            end_y = dfs["Leitungswege_frame"].end_y - hosy
-            start_y = end_y - frame_value_height
-
-            frame_value_position = {
-                "start_x": hosx,
-                "end_x": header_1_col_1_width,
-                "start_y": start_y,
-                "end_y": end_y,
-            }
-
-            dfs["Leitungswege_value"] = dfs["main_frame"].add_frame(
-                c,
-                **frame_value_position,
-                **frame_value_style,
-            )
-
-            c.acroForm.textfield(
-                name="Leitungswege_value",
-                value=frame_value_text.replace("<br/>", "\n"),
-                x=dfs["Leitungswege_value"].frame_container.start_x,
-                y=dfs["Leitungswege_value"].frame_container.start_y,
-                width=dfs["Leitungswege_value"].frame_container.width,
-                height=dfs["Leitungswege_value"].frame_container.height,
-                **dict_text_field_header_value_params,
-            )
-
-            frame_description_text = "Ort"
-
-            frame_value_text = dict_treated_values["Ort"]
-            text_value_style = dict_font_header_1_value_style
-            p = Paragraph(frame_value_text, style=ParagraphStyle(**text_value_style))
-            p.wrap(header_1_col_1_width, 1e6)
-            lines_necessary = max(1, (len(p.getActualLineWidths0())))
-
-            frame_value_height = 1.3 * text_value_style["fontSize"] * lines_necessary
-
-            frame_height = max(min_height_header_1, frame_value_height) + frame_description_height + hosy
-
-            end_y = dfs["Leitungswege_frame"].end_y
-            start_y = end_y - frame_height
-
-            frame_position = {
-                "start_x": header_1_col_1_width + header_1_title_width,
-                "end_x": header_1_col_1_width + header_1_title_width + header_1_col_2_width,
-                "start_y": start_y,
-                "end_y": end_y,
-            }
-
-            dfs["Ort_frame"] = dfs["main_frame"].add_frame(
-                c,
-                **frame_position,
-                **frame_style,
-            )
-
-            frame_value_text = dict_treated_values["Ort"]
-            text_value_style = dict_font_header_1_value_style
-            p = Paragraph(frame_value_text, style=ParagraphStyle(**text_value_style))
-            p.wrap(header_1_col_1_width, 1e6)
-            lines_necessary = max(1, (len(p.getActualLineWidths0())))
-
-            frame_value_height = 1.3 * text_value_style["fontSize"] * lines_necessary
-
-            end_y = dfs["Ort_frame"].end_y - hosy
-            start_y = end_y - frame_value_height
-
-            frame_value_position = {
-                "start_x": dfs["Ort_frame"].start_x + hosx,
-                "end_x": dfs["Ort_frame"].end_x,
-                "start_y": start_y,
-                "end_y": end_y,
-            }
-
-            frame_value_name = "Ort_value"
-
-            dfs[frame_value_name] = dfs["main_frame"].add_frame(
-                c,
-                **frame_value_position,
-                **frame_value_style,
-            )
-
-            c.acroForm.textfield(
-                name="Ort_value",
-                value=frame_value_text.replace("<br/>", "\n"),
-                x=dfs["Ort_value"].frame_container.start_x,
-                y=dfs["Ort_value"].frame_container.start_y,
-                width=dfs["Ort_value"].frame_container.width,
-                height=dfs["Ort_value"].frame_container.height,
-                **dict_text_field_header_value_params,
-            )
-
-            frame_description_text = "Ort"
-
-            start_y = hosy + dfs["Ort_frame"].start_y
-            end_y = start_y + frame_description_height
-
-            frame_description_position = {
-                "start_x": dfs["Ort_frame"].start_x + hosx,
-                "end_x": dfs["Ort_frame"].end_x,
-                "start_y": start_y,
-                "end_y": end_y,
-            }
-
-            frame_description_name = "Ort_frame_description"
-
-            dfs[frame_description_name] = dfs["main_frame"].add_frame(
-                c,
-                **frame_description_position,
-                **frame_dict_font_description_style,
-            )
-
-            dfs[frame_description_name].frame_container.frame.add(
-                Paragraph(frame_description_text, style=ParagraphStyle(**dict_font_description_style)),
-                c,
-            )
-
-            frame_name = "Übernahme_frame"
-
-            start_x = dfs["Ort_frame"].start_x
-            end_x = dfs["Ort_frame"].end_x
-            end_y = dfs["Ort_frame"].start_y
-            start_y = 0
-
-            frame_position = {
-                "start_x": start_x,
-                "end_x": end_x,
-                "start_y": start_y,
-                "end_y": end_y,
-            }
-
-            dfs[frame_name] = dfs["main_frame"].add_frame(
-                c,
-                **frame_position,
-                **frame_style,
-            )
-
-            frame_description_text = "Übernahme Monat - Tag - Stunde"
-
-            start_y = hosy
-            end_y = start_y + frame_description_height
-            frame_description_position = {
-                "start_x": dfs["Ort_frame"].start_x,
-                "end_x": dfs["Ort_frame"].end_x,
-                "start_y": start_y,
-                "end_y": end_y,
-            }
-
-            frame_description_name = "Ubernahme_frame_description"
-
-            dfs[frame_description_name] = dfs["main_frame"].add_frame(
-                c,
-                **frame_description_position,
-                **frame_dict_font_description_style,
-            )
-
-            dfs[frame_description_name].frame_container.frame.add(
-                Paragraph(frame_description_text, style=ParagraphStyle(**{**dict_font_description_style, "alignment": 1})),
-                c,
-            )
-
-            date = dict_treated_values["date"]
-            frame_value_text = f"{date[0]}  {date[1]}  {date[2]}".strip()
-
-            start_y = 2 * hosy + dfs["Ubernahme_frame_description"].end_y
-            end_y = start_y + frame_description_height
-
-            frame_value_position = {
-                "start_x": dfs["Ort_frame"].start_x,
-                "end_x": dfs["Ort_frame"].end_x,
-                "start_y": start_y,
-                "end_y": end_y,
-            }
-
-            dfs["Ubernahme_value"] = dfs["main_frame"].add_frame(
-                c,
-                **frame_value_position,
-                **frame_value_style,
-            )
-
-            c.acroForm.textfield(
-                name="to_be_centered_Ubernahme_value",
-                value=frame_value_text.replace("<br/>", "\n"),
-                x=dfs["Ubernahme_value"].frame_container.start_x,
-                y=dfs["Ubernahme_value"].frame_container.start_y,
-                width=dfs["Ubernahme_value"].frame_container.width,
-                height=dfs["Ubernahme_value"].frame_container.height,
-                **dict_text_field_header_value_params,
-            )
-
-            dfs["Wagenliste_frame"] = dfs["main_frame"].add_frame(
-                c,
-                dfs["Versandbahnhof_1_frame"].end_x,
-                dfs["Ort_frame"].start_x,
-                dfs["Versandbahnhof_1_frame"].start_y,
-                dfs["Ort_frame"].end_y,
-                **frame_style,
-            )
-
-            frames_wagenliste = {
-                "title_frameBahnhof_frame": {
-                    "position": ((0, 100), (5, 30)),
-                    "text": "<b>Wagenliste zum Frachtbrief</b>",
-                    "text_style": {**dict_font_title_style},
-                },
-                "Bahnhof_frame": {
-                    "position": ((0, 50), (35, 65)),
-                    "text": "Bahnhof",
-                    "text_style": {**dict_font_description_style, "alignment": 1},
-                },
-                "Unternehmen_frame": {
-                    "position": ((50, 100), (35, 65)),
-                    "text": "Unternehmen",
-                    "text_style": {**dict_font_description_style, "alignment": 1},
-                },
-                "Versand_Nr_frame": {
-                    "position": ((0, 50), (65, 95)),
-                    "text": "Versand Nr.",
-                    "text_style": {**dict_font_description_style, "alignment": 1},
-                },
-                "land_frame": {
-                    "position": ((50, 100), (65, 95)),
-                    "text": "Land",
-                    "text_style": {**dict_font_description_style, "alignment": 1},
-                },
-            }
-
-            for key, value in frames_wagenliste.items():
-                dfs[key] = create_matrix(
-                    c,
-                    dfs["Wagenliste_frame"],
-                    [value["position"]],
-                    {**transparent_frame_params, **no_padding_frame_params},
-                )[0]
-
-                dfs[key].frame_container.frame.add(
-                    Paragraph(value["text"], style=ParagraphStyle(**value["text_style"])),
-                    c,
-                )
-            values_header = {
-                "Bahnhof_value": {
-                    "frame_parent": "Bahnhof_frame",
-                    "position": ((0, 100), (moyd, 100)),
-                    "text": dict_treated_values["Bahnhof"],
-                    "text_style": {**dict_font_description_style, "alignment": 1},
-                },
-                "Unternehmen_value": {
-                    "frame_parent": "Unternehmen_frame",
-                    "position": ((0, 100), (moyd, 100)),
-                    "text": dict_treated_values["Unternehmen"],
-                    "text_style": {**dict_font_description_style, "alignment": 1},
-                },
-                "Versand_Nr_value": {
-                    "frame_parent": "Versand_Nr_frame",
-                    "position": ((0, 100), (moyd, 100)),
-                    "text": dict_treated_values["Versand_Nr"],
-                    "text_style": {**dict_font_description_style, "alignment": 1},
-                },
-                "Land_value": {
-                    "frame_parent": "land_frame",
-                    "position": ((0, 100), (moyd, 100)),
-                    "text": dict_treated_values["Land"],
-                    "text_style": {**dict_font_description_style, "alignment": 1},
-                },
-            }
-
-            for key, value in values_header.items():
-                dfs[key] = create_matrix(
-                    c,
-                    dfs[value["frame_parent"]],
-                    [value["position"]],
-                    {**transparent_frame_params, **no_padding_frame_params},
-                )[0]
-
-                c.acroForm.textfield(
-                    name=f"to_be_centered_{key}",
-                    value=value["text"].replace("<br/>", "\n"),
-                    x=dfs[key].frame_container.start_x,
-                    y=dfs[key].frame_container.start_y,
-                    width=dfs[key].frame_container.width,
-                    height=dfs[key].frame_container.height,
-                    **dict_text_field_header_value_params,
-                )
-
-            offset_y_start_table = dfs["Ort_frame"].end_y
-        else:
-            offset_y_start_table = 0
 
-        foot_height = 40
-        dfs["table_frame"] = dfs["main_frame"].add_frame(
-            c,
-            0,
-            dfs["main_frame"].frame_container.width,
-            offset_y_start_table,
-            dfs["main_frame"].frame_container.height - foot_height,
-            **{**solid_black_line_params, **no_padding_frame_params},
-        )
+def create_report_bytes(
+    wagon_values: Iterable[dict] | Mapping[str, Sequence] | np.ndarray | int, info_values: dict, repeat_header: bool = True, fillable: bool = True
+) -> bytes:
+    """Create a report in memory and return the PDF content.
 
-        dfs["foot_frame"] = dfs["main_frame"].add_frame(
-            c,
-            0,
-            dfs["main_frame"].frame_container.width,
-            dfs["main_frame"].frame_container.height - foot_height,
-            dfs["main_frame"].frame_container.height,
-            **{**solid_black_line_params, **no_padding_frame_params},
-        )
+    Takes the same values as create_report. Empty bytes are returned when no report could be created.
+    """
+    buffer = io.BytesIO()
+    if not create_report(buffer, wagon_values, info_values, repeat_header, fillable=fillable):
+        return b""
+    return buffer.getvalue()
 
-        left_foot, right_foot = create_matrix(
-            c,
-            dfs["foot_frame"],
-            [((0, 50), (0, 100)), ((50, 100), (0, 100))],
-            {**solid_black_line_params, "leftPadding": 5, "rightPadding": 5, "topPadding": 5, "bottomPadding": 5},
-        )
 
-        aux_top, aux_bottom = create_matrix(
-            c,
-            left_foot,
-            [((1.5, 100), (10, 45)), ((1, 100), (50, 100))],
-            {**transparent_frame_params, **no_padding_frame_params},
-        )
+def plan_report(
+    wagon_values: Iterable[dict] | Mapping[str, Sequence] | np.ndarray | int, info_values: dict, repeat_header: bool = True, page_totals: bool = False
+) -> list[PagePlan]:
+    """Pages that create_report would produce for the given values, without rendering anything.
 
-        aux_top.frame_container.frame.addFromList(
-            [
-                Paragraph(" Ausstellung durch", style=ParagraphStyle(**{**dict_font_description_style, "alignment": 0})),
-            ],
-            c,
-        )
+    Takes the same values as create_report. Only the header is measured, so planning is cheap even for very large reports, e.g. to
+    estimate the size of the output or to split the work evenly before rendering. A generator given as wagon_values is consumed to
+    count the wagons.
 
-        c.acroForm.textfield(
-            name="Ausstellung_durch",
-            value=dict_treated_values["Ausstellung_durch"],
-            x=aux_bottom.frame_container.start_x,
-            y=aux_bottom.frame_container.start_y,
-            width=aux_bottom.frame_container.width,
-            height=aux_bottom.frame_container.height,
-            **dict_text_field_header_value_params,
-        )
+    Returns:
+        list[PagePlan]: Per page the indexes of its wagons (wagon i is row No. i + 1), the height of its header (0 without header),
+            the number of wagon rows the page holds and whether it has the Sum line. Empty when there are no wagons or the wagon
+            columns are not valid.
 
-        aux_top, aux_bottom = create_matrix(
-            c,
-            right_foot,
-            [((1.5, 100), (10, 45)), ((1, 100), (50, 100))],
-            {**transparent_frame_params, **no_padding_frame_params},
-        )
+    """
+    if is_columnar(wagon_values):
+        wagon_values = wagon_columns(wagon_values)
+        if wagon_values is None:
+            return []
 
-        aux_top.frame_container.frame.addFromList(
-            [
-                Paragraph("Ort, Datum und Unterschrift", style=ParagraphStyle(**{**dict_font_description_style, "alignment": 0})),
-            ],
-            c,
-        )
+    if isinstance(wagon_values, int):
+        wagon_count = wagon_values
+    elif isinstance(wagon_values, Sized):
+        wagon_count = len(wagon_values)
+    else:
+        wagon_count = sum(1 for _ in wagon_values)
 
-        date = dict_treated_values["date"]
+    header_layout = plan_header_layout(get_treated_values(info_values))
+    return plan_pages(wagon_count, header_layout.height, repeat_header, total_rows=2 if page_totals else 1)
 
-        c.acroForm.textfield(
-            name="Ort_Datum_Unterschrift",
-            value=f"Seekirchen am {date[0]} {date[1]} {date[2]}",
-            x=aux_bottom.frame_container.start_x,
-            y=aux_bottom.frame_container.start_y,
-            width=aux_bottom.frame_container.width,
-            height=aux_bottom.frame_container.height,
-            **dict_text_field_header_value_params,
-        )
 
-        bottom_frame = dfs["main_frame"].add_frame(
-            c,
-            0,
-            dfs["main_frame"].frame_container.width,
-            dfs["main_frame"].frame_container.height + 2,
-            dfs["main_frame"].frame_container.height + 20,
-            **{**transparent_frame_params, **no_padding_frame_params},
-        )
+class ReportResult(NamedTuple):
+    filename: str | None
+    success: bool
+    content: bytes | None = None
+    error: str | None = None
 
-        left_bottom, right_bottom = create_matrix(
-            c,
-            bottom_frame,
-            [((0, 50), (0, 100)), ((50, 100), (0, 100))],
-            {**transparent_frame_params, **no_padding_frame_params},
-        )
 
-        left_bottom.frame_container.frame.addFromList(
-            [
-                Paragraph("Nur für den kombinierten Verkehr", style=ParagraphStyle(**{**dict_font_description_style, "alignment": 0})),
-            ],
-            c,
-        )
+def _run_report_job(job: tuple) -> ReportResult:
+    filename, wagon_values, info_values, *rest = job
+    repeat_header = rest[0] if rest else True
+    try:
+        if filename is None:
+            content = create_report_bytes(wagon_values, info_values, repeat_header)
+            return ReportResult(filename, bool(content), content=content or None)
+        return ReportResult(filename, bool(create_report(filename, wagon_values, info_values, repeat_header)))
+    except Exception as e:
+        logging.exception(f"Report {filename} failed")
+        return ReportResult(filename, False, error=f"{type(e).__name__}: {e}")
 
-        right_bottom.frame_container.frame.addFromList(
-            [
-                Paragraph("CIT-23", style=ParagraphStyle(**{**dict_font_description_style, "alignment": 2})),
-            ],
-            c,
-        )
 
-        dfs["table_header_frame"] = dfs["table_frame"].add_frame(
-            c,
-            0,
-            dfs["table_frame"].frame_container.width,
-            0,
-            45,
-            **{**solid_black_line_params, **no_padding_frame_params},
-        )
+def create_reports(jobs: Iterable[tuple], workers: int | None = None) -> list[ReportResult]:
+    """Create many reports in parallel on a process pool.
 
-        dfs["table_body_frame"] = dfs["table_frame"].add_frame(
-            c,
-            0,
-            dfs["table_frame"].frame_container.width,
-            45,
-            dfs["table_frame"].frame_container.height,
-            **{**solid_black_line_params, **no_padding_frame_params},
-        )
+    Every report is rendered in memory by its own worker process, so reports never share scratch files and can run at the same time
+    from the same working directory. A failing job is reported in its result and does not abort the rest of the batch.
 
-        dict_col_params = {
-            "No.": {"col_name": "No.", "position": ((0, 4), (35, 70))},
-            "Wagen": {"col_name": "Wagen", "position": ((4, 23), (35, 70))},
-            "BezDG": {"col_name": "Bezeichnung des Gutes", "position": ((23, 44), (35, 70))},
-            "NHM": {"col_name": "NHM", "position": ((44, 52), (35, 70))},
-            "PN": {"col_name": "Plomben Nummer", "position": ((52, 62), (25, 80))},
-            "RID": {"col_name": "RID", "position": ((62, 64), (10, 100)), "offset": 5},
-            "NettoMasse": {"col_name": "Netto Masse", "position": ((64, 76), (35, 70))},
-            "TaraWagon": {"col_name": "Tara Wagon", "position": ((76, 88), (35, 70))},
-            "BruttoMasse": {"col_name": "Brutto Masse", "position": ((88, 100), (35, 70))},
-        }
-
-        for key, value in dict_col_params.items():
-            dfs[key + "_frame"] = create_matrix(
-                c,
-                dfs["table_header_frame"],
-                [(value["position"][0], (0, 100))],
-                {**solid_black_line_params, **no_padding_frame_params},
-            )[0]
-
-            dfs[key + "_frame_description"] = create_matrix(
-                c,
-                dfs[key + "_frame"],
-                [((0, 100), value["position"][1])],
-                {**transparent_frame_params, **no_padding_frame_params},
-            )[0]
-
-            dfs[key + "_table_values"] = create_matrix(
-                c,
-                dfs["table_body_frame"],
-                [(value["position"][0], (0, 100))],
-                {**solid_black_line_params, **no_padding_frame_params},
-            )[0]
-
-            aux = create_matrix(
-                c,
-                dfs[key + "_frame_description"],
-                [((0, 100), (0, 100))],
-                {**transparent_frame_params, **no_padding_frame_params},
-            )[0]
-            if key != "RID":
-                aux.frame_container.frame.addFromList(
-                    [
-                        Paragraph(f"{value['col_name']}", style=ParagraphStyle(**{**dict_font_description_style, "alignment": 1})),
-                    ],
-                    c,
-                )
-            else:
-                aux.frame_container.frame.addFromList(
-                    [Paragraph(f"{aux}", style=ParagraphStyle(**{**dict_font_description_style, "alignment": 1})) for aux in value["col_name"]],
-                    c,
-                )
-
-        table_body_height = dfs["table_body_frame"].frame_container.height
-        line_height = 18
-
-        quant_wagons_this_page = int(table_body_height // line_height) - 1
-
-        for row_idx in range(quant_wagons_this_page):
-            if len(wagon_values) < 1:
-                break
-            wagon = wagon_values.pop(0)
-            start_y = row_idx * line_height + 2
-            end_y = start_y + line_height
-            for col_name in dict_col_params:
-                value = row_idx + 1 + last_idx_last_page if col_name == "No." else wagon[col_name]
-
-                aux_frame = dfs[col_name + "_table_values"].add_frame(
-                    c,
-                    0,
-                    dfs[col_name + "_table_values"].frame_container.width,
-                    start_y,
-                    end_y,
-                    **{**transparent_frame_params, **no_padding_frame_params},
-                )
-
-                c.acroForm.textfield(
-                    name=f"to_be_centered_{count_item}",
-                    value=f"{value}",
-                    x=aux_frame.frame_container.start_x,
-                    y=aux_frame.frame_container.start_y,
-                    width=aux_frame.frame_container.width,
-                    height=aux_frame.frame_container.height,
-                    **dict_text_field_table_params,
-                )
-                count_item += 1
-
-        is_last_page = len(wagon_values) == 0
-
-        last_idx_last_page += quant_wagons_this_page
-
-        if is_last_page:
-            masses = dict_treated_values["Sum_masses"]
-            start_y += line_height  # type: ignore
-            end_y += line_height  # type: ignore
-
-            c.setDash(1, 1)
-            create_line(
-                c,
-                dfs["main_frame"].start_x,
-                dfs["main_frame"].end_x,
-                aux_frame.frame_container.start_y,  # type: ignore
-                aux_frame.frame_container.start_y,  # type: ignore
-                (0, 0, 0),
-                1,
-            )
-
-            for col_name, col_value in zip(["PN", "NettoMasse", "TaraWagon", "BruttoMasse"], ["Sum:"] + masses, strict=False):
-                aux_frame = dfs[col_name + "_table_values"].add_frame(
-                    c,
-                    0,
-                    dfs[col_name + "_table_values"].frame_container.width,
-                    start_y,
-                    end_y,
-                    **{**transparent_frame_params, **no_padding_frame_params},
-                )
-                c.acroForm.textfield(
-                    name=f"to_be_centered_{count_item}",
-                    value=col_value.replace("<br/>", "\n"),
-                    x=aux_frame.frame_container.start_x,
-                    y=aux_frame.frame_container.start_y,
-                    width=aux_frame.frame_container.width,
-                    height=aux_frame.frame_container.height,
-                    **dict_text_field_table_params,
-                )
-                count_item += 1
-
-        c.showPage()
-    c.save()
-
-    temp_file = "temporary.pdf"
-    if not os.path.exists(temp_file):
-        logging.error(f"File {temp_file} not found")
-        return 0
+    Args:
+        jobs (Iterable[tuple]): Tuples (filename, wagon_values, info_values, repeat_header) with the same meaning as the arguments of
+            create_report. repeat_header may be omitted and defaults to True. When filename is None the PDF is returned in the result content.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs. With 1 the reports are created in this process.
 
-    pdf = PdfReader(temp_file)
+    Returns:
+        list[ReportResult]: One result per job, in the order of the jobs.
 
-    pdf.Root.AcroForm.update(PdfDict(NeedAppearances=PdfObject("true")))  # type: ignore
+    """
+    jobs = list(jobs)
+    if workers == 1:
+        return [_run_report_job(job) for job in jobs]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_report_job, job) for job in jobs]
+        for job, future in zip(jobs, futures, strict=True):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logging.exception(f"Report {job[0]} failed")
+                results.append(ReportResult(job[0], False, error=f"{type(e).__name__}: {e}"))
+    return results
+
+
+def render_pages(
+    wagons: list[dict],
+    dict_treated_values: dict,
+    repeat_header: bool,
+    fillable: bool,
+    first_wagon: int,
+    last_part: bool,
+    page_totals: bool = False,
+    carried: MassTotals | None = None,
+) -> bytes:
+    """Render the pages of a range of wagons of a report as a document of their own, to be merged with IncrementalPdfWriter.
+
+    The range must start on a page boundary, see plan_pages. Its pages get the row numbers, the field names and the header they have in
+    the full report, and the Sum line when last_part is True. carried holds the sums of the masses of the wagons before the range,
+    which the page totals and the computed Sum line continue.
+    """
+    buffer = io.BytesIO()
+    _create_report(
+        buffer,
+        wagons,
+        dict_treated_values,
+        repeat_header,
+        fillable=fillable,
+        page_totals=page_totals,
+        carried=carried,
+        first_wagon=first_wagon,
+        last_part=last_part,
+    )
+    return buffer.getvalue()
+
+
+def _render_part(part: tuple) -> PdfRecording:
+    # The objects are formatted in the worker, the parent process only appends them
+    return IncrementalPdfWriter.record(render_pages(*part))
+
+
+def _create_report_parallel(
+    output: str | BinaryIO,
+    wagon_values: Iterable[dict],
+    dict_treated_values: dict,
+    repeat_header: bool,
+    workers: int,
+    progress: Callable[[int], None] | None = None,
+    fillable: bool = True,
+    stats: ReportStats | None = None,
+    cancelled: Callable[[], bool] | None = None,
+    page_totals: bool = False,
+) -> int:
+    # Wagons given as columns are sliced without copying the rows
+    wagons = wagon_values if isinstance(wagon_values, Sequence) else list(wagon_values)
+    if not wagons:
+        logging.error("No wagons to create the report")
+        return 0
 
-    for page in pdf.pages:  # type: ignore
-        if "/Annots" in page:
-            for annot in page["/Annots"]:
-                if annot.T.startswith("(to_be_centered"):
-                    annot.update(PdfDict(Q=1))
+    with phase(stats, "plan_header"):
+        pages = plan_pages(len(wagons), plan_header_layout(dict_treated_values).height, repeat_header, total_rows=2 if page_totals else 1)
+
+    # Every part is a range of whole pages, so it starts with the row number, the field names and the header it has in the full report
+    part_count = min(workers, len(pages))
+    parts = []
+    carried = MassTotals()
+    rows = mass_rows(wagons) if page_totals or dict_treated_values["Sum_masses"] is None else None
+    for part_idx in range(part_count):
+        part_pages = pages[part_idx * len(pages) // part_count : (part_idx + 1) * len(pages) // part_count]
+        start, stop = part_pages[0].wagons.start, part_pages[-1].wagons.stop
+        parts.append((wagons[start:stop], dict_treated_values, repeat_header, fillable, start, stop == len(wagons), page_totals, carried))
+        if rows is not None:
+            carried = carried + sum_masses(rows[start:stop])
+
+    writer = IncrementalPdfWriter(output, progress)
+    try:
+        with ProcessPoolExecutor(max_workers=part_count) as executor:
+            for recording in executor.map(_render_part, parts):
+                if cancelled is not None and cancelled():
+                    executor.shutdown(cancel_futures=True)
+                    writer.abort()
+                    logging.warning("Report cancelled")
+                    return 0
+                with phase(stats, "merge"):
+                    writer.add_recording(recording)
+
+        with phase(stats, "save"):
+            writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    if stats is not None:
+        stats.count("pages", len(pages))
+
+    if isinstance(output, str):
+        logging.info(f"File created: {output}")
+    return 1
 
-    PdfWriter().write(filename, pdf)
 
-    if os.path.exists("temporary.pdf"):
-        os.remove("temporary.pdf")
+def _add_sum_line(c: canvas.Canvas, fillable: bool, page_layout: PageLayout, row_idx: int, names: list[str], label: str, masses: list[str]) -> int:
+    """Put a label and the sums of the masses in a row of the wagon table. Returns the number of fields added."""
+    col_names = [sum_label_key, *list_mass_keys]
+    for name, col_name, col_value in zip(names, col_names, [label, *masses], strict=False):
+        col_idx = list(dict_col_params).index(col_name)
+        add_text_field(
+            c,
+            fillable,
+            name=name,
+            value=col_value.replace("<br/>", "\n"),
+            x=page_layout.cell_x[row_idx][col_idx],
+            y=page_layout.cell_y[row_idx][col_idx],
+            width=page_layout.cell_width[row_idx][col_idx],
+            height=page_layout.cell_height[row_idx][col_idx],
+            **dict_text_field_table_params,
+        )
+    return min(len(col_names), len(masses) + 1)
+
+
+def _create_report(
+    output: str | BinaryIO,
+    wagon_values: Iterable[dict],
+    dict_treated_values: dict,
+    repeat_header: bool = True,
+    flush_pages: bool = False,
+    progress: Callable[[int], None] | None = None,
+    fillable: bool = True,
+    stats: ReportStats | None = None,
+    cancelled: Callable[[], bool] | None = None,
+    page_totals: bool = False,
+    carried: MassTotals | None = None,
+    first_wagon: int = 0,
+    last_part: bool = True,
+) -> int:
+    # A report rendered in parts starts a part at its first wagon and the sums of the wagons before it, and only puts the Sum line at
+    # the end of the last part
+    # Wagons are pulled one at a time, next_wagon looks one ahead to know whether the current page is the last one
+    wagons = iter(wagon_values)
+    next_wagon = next(wagons, None)
+
+    if next_wagon is None:
+        logging.error("No wagons to create the report")
+        return 0
 
-    logging.info(f"File created: {filename}")
+    # Without large report mode the canvas writes the whole document straight to the output
+    writer = IncrementalPdfWriter(output, progress) if flush_pages else None
+    try:
+        buffer = io.BytesIO() if writer else output
+        c = canvas.Canvas(buffer, pagesize=A4)
+        if fillable:
+            install_acroform(c)
+
+        with phase(stats, "plan_header"):
+            header_layout = plan_header_layout(dict_treated_values)
+        page_layouts: dict[bool, PageLayout] = {}
+
+        # The masses are only summed when sums are shown that are not given
+        sum_wagon_masses = page_totals or dict_treated_values["Sum_masses"] is None
+        totals = carried if carried is not None else MassTotals()
+
+        last_idx_last_page = first_wagon
+        is_last_page = False
+        count_item = first_wagon * len(dict_col_params)
+        while next_wagon is not None:
+            if cancelled is not None and cancelled():
+                if writer is not None:
+                    writer.abort()
+                logging.warning("Report cancelled")
+                return 0
+
+            if stats is not None:
+                page_start = time.perf_counter()
+                page_first_item = count_item
+
+            must_add_header = repeat_header or last_idx_last_page == 0
+
+            if must_add_header not in page_layouts:
+                with phase(stats, "plan_page"):
+                    page_layouts[must_add_header] = plan_page_layout(
+                        dict_treated_values, header_layout if must_add_header else None, total_rows=2 if page_totals else 1
+                    )
+
+            page_layout = page_layouts[must_add_header]
+            with phase(stats, "draw_skeleton"):
+                skeleton_defined = page_layout.draw(c, fillable)
+            dfs = page_layout.frames
+
+            page_masses = []
+            with phase(stats, "table_rows"):
+                for row_idx in range(page_layout.rows):
+                    if next_wagon is None:
+                        break
+                    wagon, next_wagon = next_wagon, next(wagons, None)
+                    last_row_idx = row_idx
+                    if sum_wagon_masses:
+                        page_masses.append([wagon[key] for key in list_mass_keys])
+                    for col_idx, col_name in enumerate(dict_col_params):
+                        value = row_idx + 1 + last_idx_last_page if col_name == "No." else wagon[col_name]
+
+                        add_text_field(
+                            c,
+                            fillable,
+                            name=f"to_be_centered_{count_item}",
+                            value=f"{value}",
+                            x=page_layout.cell_x[row_idx][col_idx],
+                            y=page_layout.cell_y[row_idx][col_idx],
+                            width=page_layout.cell_width[row_idx][col_idx],
+                            height=page_layout.cell_height[row_idx][col_idx],
+                            **dict_text_field_table_params,
+                        )
+                        count_item += 1
+
+            is_last_page = next_wagon is None and last_part
+
+            page_first_wagon = last_idx_last_page
+            last_idx_last_page += page_layout.rows
+
+            total_fields = 0
+            if sum_wagon_masses:
+                page_sums = sum_masses(page_masses)
+                totals = totals + page_sums
+
+            if page_totals or is_last_page:
+                with phase(stats, "sum_row"):
+                    sum_row_idx = last_row_idx + 1
+
+                    c.setDash(1, 1)
+                    create_line(
+                        c,
+                        dfs["main_frame"].start_x,
+                        dfs["main_frame"].end_x,
+                        page_layout.cell_y[last_row_idx][-1],
+                        page_layout.cell_y[last_row_idx][-1],
+                        (0, 0, 0),
+                        1,
+                    )
+
+                    # Page totals are named after the first wagon of their page, so they keep their names however the report is split
+                    if page_totals:
+                        names = [f"subtotal_{page_first_wagon}_{idx}" for idx in range(len(list_mass_keys) + 1)]
+                        total_fields += _add_sum_line(c, fillable, page_layout, sum_row_idx, names, "Subtotal:", page_sums.formatted())
+                        sum_row_idx += 1
+                        if not is_last_page:
+                            names = [f"carried_{page_first_wagon}_{idx}" for idx in range(len(list_mass_keys) + 1)]
+                            total_fields += _add_sum_line(c, fillable, page_layout, sum_row_idx, names, "Carried:", totals.formatted())
+
+                    if is_last_page:
+                        masses = dict_treated_values["Sum_masses"]
+                        if masses is None:
+                            masses = totals.formatted()
+                        names = [f"to_be_centered_{count_item + idx}" for idx in range(len(masses) + 1)]
+                        count_item += _add_sum_line(c, fillable, page_layout, sum_row_idx, names, "Sum:", masses)
+
+            with phase(stats, "finish_page"):
+                if writer is None:
+                    c.showPage()
+                else:
+                    # Large report mode: the finished page is written out and the next page is drawn on a fresh canvas
+                    c.save()
+                    writer.add_pdf(buffer.getvalue())
+                    buffer = io.BytesIO()
+                    c = canvas.Canvas(buffer, pagesize=A4)
+                    if fillable:
+                        install_acroform(c)
+
+            if stats is not None:
+                stats.add_page(time.perf_counter() - page_start)
+                # The skeleton is drawn once per document into a form that the other pages reuse
+                if skeleton_defined:
+                    stats.count("frames", page_layout.recorder.count("rect"))
+                    stats.count("paragraphs", page_layout.recorder.count("drawParagraph"))
+                if fillable:
+                    stats.count("fields", count_item - page_first_item + total_fields + len(page_layout.text_fields))
+
+        with phase(stats, "save"):
+            if writer is None:
+                c.save()
+            else:
+                writer.close()
+    except BaseException:
+        # The canvas only writes to the output when it is saved, the writer of large report mode has written part of the document
+        if writer is not None:
+            writer.abort()
+        raise
+
+    if isinstance(output, str):
+        logging.info(f"File created: {output}")
     return 1
@@ -1,9 +1,15 @@
+from types import MappingProxyType
+
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 
 list_wagon_necessary_keys = ["Wagen", "BezDG", "NHM", "PN", "RID", "NettoMasse", "TaraWagon", "BruttoMasse"]
 
+# Wagon values summed in the Sum line, and the column that holds the label of the Sum line
+list_mass_keys = ["NettoMasse", "TaraWagon", "BruttoMasse"]
+sum_label_key = "PN"
+
 
 styles = getSampleStyleSheet()
 dark_green_color = (4 / 255, 145 / 255, 103 / 255)
@@ -75,8 +81,12 @@ dict_text_field_table_params = {
     "borderWidth": 0,
     "fontName": "Helvetica",
     "fontSize": 10,
+    "alignment": 1,
 }
 
+# Space kept by viewers between the border of a form field and its text
+field_text_padding = 2
+
 dict_text_field_header_value_params = {
     "fillColor": colors.transparent,
     "borderWidth": 0,
@@ -120,6 +130,48 @@ dict_font_title_style = {**dict_default_style, **dict_font_big_style, "alignment
 dict_font_wagenliste_description_style = {**dict_default_style, **dict_font_small_style, "alignment": 1}
 wagenliste_value_style = {**dict_default_style, **dict_font_small_style, "alignment": 1}
 
+
+class FrozenParagraphStyle(ParagraphStyle):
+    """Paragraph style that can not be changed once created. Derive new styles with FrozenParagraphStyle(name, parent=style, ...)."""
+
+    def __init__(self, name: str, parent: ParagraphStyle | None = None, **kwargs) -> None:
+        if parent is not None and not isinstance(parent, FrozenParagraphStyle):
+            # reportlab only derives a style from a parent of the same class, so the values of other parents are copied
+            kwargs = {**{key: value for key, value in parent.__dict__.items() if key not in ("name", "parent")}, **kwargs}
+            parent = None
+        super().__init__(name, parent, **kwargs)
+        self.__dict__["_frozen"] = True
+
+    def _check_frozen(self) -> None:
+        if self.__dict__.get("_frozen"):
+            msg = f"Paragraph style {self.name} is shared by all reports and can not be changed"
+            raise AttributeError(msg)
+
+    def __setattr__(self, name: str, value) -> None:
+        self._check_frozen()
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name: str) -> None:
+        self._check_frozen()
+        super().__delattr__(name)
+
+
+# Paragraph styles built once and shared by every page and report. The measurements of text_metrics are cached by style name
+paragraph_styles = MappingProxyType(
+    {
+        "description": FrozenParagraphStyle(**dict_font_description_style),
+        "description_center": FrozenParagraphStyle(**{**dict_font_description_style, "alignment": 1}),
+        "description_right": FrozenParagraphStyle(**{**dict_font_description_style, "alignment": 2}),
+        "header_1_value": FrozenParagraphStyle(**dict_font_header_1_value_style),
+        "title": FrozenParagraphStyle(**dict_font_title_style),
+    },
+)
+
+# Height of a line of text relative to its font size
+text_line_spacing = 1.3
+# Number of (text, width, style) measurements kept in memory
+text_measure_cache_size = 4096
+
 frame_description_height = 1.5 * dict_font_description_style["fontSize"]
 
 list_value_names = [
@@ -137,3 +189,25 @@ list_value_names = [
     "Land",
     "Ausstellung_durch",
 ]
+
+# Height of the footer below the wagon table
+foot_height = 40
+
+# Height of the column titles of the wagon table
+table_header_height = 45
+
+# Height of a row of the wagon table
+line_height = 18
+
+# Columns of the wagon table. Positions are ((start_x, end_x), (start_y, end_y)) in percent of the table header
+dict_col_params = {
+    "No.": {"col_name": "No.", "position": ((0, 4), (35, 70))},
+    "Wagen": {"col_name": "Wagen", "position": ((4, 23), (35, 70))},
+    "BezDG": {"col_name": "Bezeichnung des Gutes", "position": ((23, 44), (35, 70))},
+    "NHM": {"col_name": "NHM", "position": ((44, 52), (35, 70))},
+    "PN": {"col_name": "Plomben Nummer", "position": ((52, 62), (25, 80))},
+    "RID": {"col_name": "RID", "position": ((62, 64), (10, 100)), "offset": 5},
+    "NettoMasse": {"col_name": "Netto Masse", "position": ((64, 76), (35, 70))},
+    "TaraWagon": {"col_name": "Tara Wagon", "position": ((76, 88), (35, 70))},
+    "BruttoMasse": {"col_name": "Brutto Masse", "position": ((88, 100), (35, 70))},
+}
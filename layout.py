@@ -0,0 +1,828 @@
+from typing import NamedTuple
+
+import numpy as np
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Paragraph
+
+from global_vars import (
+    A4_height,
+    A4_width,
+    bottom_margin,
+    dict_col_params,
+    dict_text_field_header_value_params,
+    foot_height,
+    frame_description_height,
+    frame_dict_font_description_style,
+    frame_style,
+    frame_value_style,
+    header_1_col_1_width,
+    header_1_col_2_width,
+    header_1_title_width,
+    hosx,
+    hosy,
+    left_margin,
+    line_height,
+    main_frame_height,
+    min_height_header_1,
+    moyd,
+    no_padding_frame_params,
+    paragraph_styles,
+    right_margin,
+    solid_black_line_params,
+    table_header_height,
+    top_margin,
+    transparent_frame_params,
+)
+from text_metrics import measure_text
+from utils import CanvasRecorder, FrameComposite, create_matrix, draw_field_text
+
+
+class HeaderLayout:
+    """Header of a report page: the recorded frames and descriptions, the value text fields and the height taken by the header.
+
+    The header only depends on the treated values, so it is planned once per report and drawn on every page that shows it.
+    """
+
+    def __init__(self) -> None:
+        self.recorder = CanvasRecorder()
+        self.text_fields = []
+        self.height = 0
+
+    def add_text_field(self, **kwargs) -> None:
+        self.text_fields.append(kwargs)
+
+
+def plan_header_layout(dict_treated_values: dict) -> HeaderLayout:
+    header_layout = HeaderLayout()
+    recorder = header_layout.recorder
+
+    dfs: dict[str, FrameComposite] = {}
+    dfs["main_frame"] = FrameComposite(
+        recorder,
+        left_margin,
+        A4_width - right_margin,
+        bottom_margin,
+        A4_height - top_margin,
+        **transparent_frame_params,
+    )
+
+    frame_description_text = "Versandbahnhof"
+
+    frame_description_position = {
+        "start_x": hosx,
+        "end_x": header_1_col_1_width,
+        "start_y": hosy,
+        "end_y": frame_description_height + hosy,
+    }
+
+    frame_description_name = "Versandbahnhof_1_description"
+
+    dfs[frame_description_name] = dfs["main_frame"].add_frame(
+        recorder,
+        **frame_description_position,
+        **frame_dict_font_description_style,
+    )
+
+    recorder.add_paragraphs(
+        dfs[frame_description_name].frame_container.frame,
+        [Paragraph(frame_description_text, style=paragraph_styles["description"])],
+    )
+
+    frame_value_text = dict_treated_values["Versandbahnhof_1"]
+    frame_value_height = measure_text(frame_value_text, header_1_col_1_width).height
+
+    frame_height = max(min_height_header_1, frame_value_height) + frame_description_height + hosy
+
+    start_y = 0
+    end_y = frame_height
+
+    frame_position = {
+        "start_x": 0,
+        "end_x": header_1_col_1_width,
+        "start_y": start_y,
+        "end_y": end_y,
+    }
+
+    dfs["Versandbahnhof_1_frame"] = dfs["main_frame"].add_frame(
+        recorder,
+        **frame_position,
+        **frame_style,
+    )
+
+    end_y = dfs["Versandbahnhof_1_frame"].end_y - hosy
+
+    start_y = end_y - frame_value_height
+
+    frame_value_position = {
+        "start_x": hosx,
+        "end_x": header_1_col_1_width,
+        "start_y": start_y,
+        "end_y": end_y,
+    }
+
+    dfs["Versandbahnhof_1_value"] = dfs["main_frame"].add_frame(
+        recorder,
+        **frame_value_position,
+        **frame_value_style,
+    )
+
+    header_layout.add_text_field(
+        name="Versandbahnhof_1_value",
+        value=frame_value_text.replace("<br/>", "\n"),
+        x=dfs["Versandbahnhof_1_value"].frame_container.start_x,
+        y=dfs["Versandbahnhof_1_value"].frame_container.start_y,
+        width=dfs["Versandbahnhof_1_value"].frame_container.width,
+        height=dfs["Versandbahnhof_1_value"].frame_container.height,
+        **dict_text_field_header_value_params,
+    )
+
+    frame_description_text = "Versandbahnhof"
+
+    start_y = hosy + dfs["Versandbahnhof_1_frame"].end_y
+    end_y = start_y + frame_description_height
+
+    frame_description_position = {
+        "start_x": hosx,
+        "end_x": header_1_col_1_width,
+        "start_y": start_y,
+        "end_y": end_y,
+    }
+
+    dfs["Versandbahnhof_2_description"] = dfs["main_frame"].add_frame(
+        recorder,
+        **frame_description_position,
+        **frame_dict_font_description_style,
+    )
+
+    recorder.add_paragraphs(
+        dfs["Versandbahnhof_2_description"].frame_container.frame,
+        [Paragraph(frame_description_text, style=paragraph_styles["description"])],
+    )
+
+    frame_value_text = dict_treated_values["Versandbahnhof_2"]
+    frame_value_height = measure_text(frame_value_text, header_1_col_1_width).height
+
+    frame_height = max(min_height_header_1, frame_value_height) + frame_description_height + hosy
+
+    start_y = dfs["Versandbahnhof_1_frame"].end_y
+    end_y = start_y + frame_height
+
+    frame_position = {
+        "start_x": 0,
+        "end_x": header_1_col_1_width,
+        "start_y": start_y,
+        "end_y": end_y,
+    }
+
+    dfs["Versandbahnhof_2_frame"] = dfs["main_frame"].add_frame(
+        recorder,
+        **frame_position,
+        **frame_style,
+    )
+
+    end_y = dfs["Versandbahnhof_2_frame"].end_y - hosy
+    start_y = end_y - frame_value_height
+
+    frame_value_position = {
+        "start_x": hosx,
+        "end_x": header_1_col_1_width,
+        "start_y": start_y,
+        "end_y": end_y,
+    }
+
+    dfs["Versandbahnhof_2_value"] = dfs["main_frame"].add_frame(
+        recorder,
+        **frame_value_position,
+        **frame_value_style,
+    )
+
+    header_layout.add_text_field(
+        name="Versandbahnhof_2_value",
+        value=frame_value_text.replace("<br/>", "\n"),
+        x=dfs["Versandbahnhof_2_value"].frame_container.start_x,
+        y=dfs["Versandbahnhof_2_value"].frame_container.start_y,
+        width=dfs["Versandbahnhof_2_value"].frame_container.width,
+        height=dfs["Versandbahnhof_2_value"].frame_container.height,
+        **dict_text_field_header_value_params,
+    )
+
+    frame_description_text = "Leitungswege"
+
+    start_y = hosy + dfs["Versandbahnhof_2_frame"].end_y
+    end_y = start_y + frame_description_height
+
+    frame_description_position = {
+        "start_x": hosx,
+        "end_x": header_1_col_1_width,
+        "start_y": start_y,
+        "end_y": end_y,
+    }
+
+    frame_description_name = "Leitungswege_frame_description"
+
+    dfs[frame_description_name] = dfs["main_frame"].add_frame(
+        recorder,
+        **frame_description_position,
+        **frame_dict_font_description_style,
+    )
+
+    recorder.add_paragraphs(
+        dfs[frame_description_name].frame_container.frame,
+        [Paragraph(frame_description_text, style=paragraph_styles["description"])],
+    )
+
+    frame_value_text = dict_treated_values["Leitungswege"]
+    frame_value_height = measure_text(frame_value_text, header_1_col_1_width).height
+
+    frame_height = max(min_height_header_1, frame_value_height) + frame_description_height + hosy
+
+    start_y = dfs["Versandbahnhof_2_frame"].end_y
+    end_y = start_y + frame_height
+
+    frame_position = {
+        "start_x": 0,
+        "end_x": header_1_col_1_width,
+        "start_y": start_y,
+        "end_y": end_y,
+    }
+
+    dfs["Leitungswege_frame"] = dfs["main_frame"].add_frame(
+        recorder,
+        **frame_position,
+        **frame_style,
+    )
+
+    end_y = dfs["Leitungswege_frame"].end_y - hosy
+    start_y = end_y - frame_value_height
+
+    frame_value_position = {
+        "start_x": hosx,
+        "end_x": header_1_col_1_width,
+        "start_y": start_y,
+        "end_y": end_y,
+    }
+
+    dfs["Leitungswege_value"] = dfs["main_frame"].add_frame(
+        recorder,
+        **frame_value_position,
+        **frame_value_style,
+    )
+
+    header_layout.add_text_field(
+        name="Leitungswege_value",
+        value=frame_value_text.replace("<br/>", "\n"),
+        x=dfs["Leitungswege_value"].frame_container.start_x,
+        y=dfs["Leitungswege_value"].frame_container.start_y,
+        width=dfs["Leitungswege_value"].frame_container.width,
+        height=dfs["Leitungswege_value"].frame_container.height,
+        **dict_text_field_header_value_params,
+    )
+
+    frame_description_text = "Ort"
+
+    frame_value_text = dict_treated_values["Ort"]
+    frame_value_height = measure_text(frame_value_text, header_1_col_1_width).height
+
+    frame_height = max(min_height_header_1, frame_value_height) + frame_description_height + hosy
+
+    end_y = dfs["Leitungswege_frame"].end_y
+    start_y = end_y - frame_height
+
+    frame_position = {
+        "start_x": header_1_col_1_width + header_1_title_width,
+        "end_x": header_1_col_1_width + header_1_title_width + header_1_col_2_width,
+        "start_y": start_y,
+        "end_y": end_y,
+    }
+
+    dfs["Ort_frame"] = dfs["main_frame"].add_frame(
+        recorder,
+        **frame_position,
+        **frame_style,
+    )
+
+    end_y = dfs["Ort_frame"].end_y - hosy
+    start_y = end_y - frame_value_height
+
+    frame_value_position = {
+        "start_x": dfs["Ort_frame"].start_x + hosx,
+        "end_x": dfs["Ort_frame"].end_x,
+        "start_y": start_y,
+        "end_y": end_y,
+    }
+
+    frame_value_name = "Ort_value"
+
+    dfs[frame_value_name] = dfs["main_frame"].add_frame(
+        recorder,
+        **frame_value_position,
+        **frame_value_style,
+    )
+
+    header_layout.add_text_field(
+        name="Ort_value",
+        value=frame_value_text.replace("<br/>", "\n"),
+        x=dfs["Ort_value"].frame_container.start_x,
+        y=dfs["Ort_value"].frame_container.start_y,
+        width=dfs["Ort_value"].frame_container.width,
+        height=dfs["Ort_value"].frame_container.height,
+        **dict_text_field_header_value_params,
+    )
+
+    frame_description_text = "Ort"
+
+    start_y = hosy + dfs["Ort_frame"].start_y
+    end_y = start_y + frame_description_height
+
+    frame_description_position = {
+        "start_x": dfs["Ort_frame"].start_x + hosx,
+        "end_x": dfs["Ort_frame"].end_x,
+        "start_y": start_y,
+        "end_y": end_y,
+    }
+
+    frame_description_name = "Ort_frame_description"
+
+    dfs[frame_description_name] = dfs["main_frame"].add_frame(
+        recorder,
+        **frame_description_position,
+        **frame_dict_font_description_style,
+    )
+
+    recorder.add_paragraphs(
+        dfs[frame_description_name].frame_container.frame,
+        [Paragraph(frame_description_text, style=paragraph_styles["description"])],
+    )
+
+    frame_name = "Übernahme_frame"
+
+    start_x = dfs["Ort_frame"].start_x
+    end_x = dfs["Ort_frame"].end_x
+    end_y = dfs["Ort_frame"].start_y
+    start_y = 0
+
+    frame_position = {
+        "start_x": start_x,
+        "end_x": end_x,
+        "start_y": start_y,
+        "end_y": end_y,
+    }
+
+    dfs[frame_name] = dfs["main_frame"].add_frame(
+        recorder,
+        **frame_position,
+        **frame_style,
+    )
+
+    frame_description_text = "Übernahme Monat - Tag - Stunde"
+
+    start_y = hosy
+    end_y = start_y + frame_description_height
+    frame_description_position = {
+        "start_x": dfs["Ort_frame"].start_x,
+        "end_x": dfs["Ort_frame"].end_x,
+        "start_y": start_y,
+        "end_y": end_y,
+    }
+
+    frame_description_name = "Ubernahme_frame_description"
+
+    dfs[frame_description_name] = dfs["main_frame"].add_frame(
+        recorder,
+        **frame_description_position,
+        **frame_dict_font_description_style,
+    )
+
+    recorder.add_paragraphs(
+        dfs[frame_description_name].frame_container.frame,
+        [Paragraph(frame_description_text, style=paragraph_styles["description_center"])],
+    )
+
+    date = dict_treated_values["date"]
+    frame_value_text = f"{date[0]}  {date[1]}  {date[2]}".strip()
+
+    start_y = 2 * hosy + dfs["Ubernahme_frame_description"].end_y
+    end_y = start_y + frame_description_height
+
+    frame_value_position = {
+        "start_x": dfs["Ort_frame"].start_x,
+        "end_x": dfs["Ort_frame"].end_x,
+        "start_y": start_y,
+        "end_y": end_y,
+    }
+
+    dfs["Ubernahme_value"] = dfs["main_frame"].add_frame(
+        recorder,
+        **frame_value_position,
+        **frame_value_style,
+    )
+
+    header_layout.add_text_field(
+        name="to_be_centered_Ubernahme_value",
+        value=frame_value_text.replace("<br/>", "\n"),
+        x=dfs["Ubernahme_value"].frame_container.start_x,
+        y=dfs["Ubernahme_value"].frame_container.start_y,
+        width=dfs["Ubernahme_value"].frame_container.width,
+        height=dfs["Ubernahme_value"].frame_container.height,
+        alignment=1,
+        **dict_text_field_header_value_params,
+    )
+
+    dfs["Wagenliste_frame"] = dfs["main_frame"].add_frame(
+        recorder,
+        dfs["Versandbahnhof_1_frame"].end_x,
+        dfs["Ort_frame"].start_x,
+        dfs["Versandbahnhof_1_frame"].start_y,
+        dfs["Ort_frame"].end_y,
+        **frame_style,
+    )
+
+    frames_wagenliste = {
+        "title_frameBahnhof_frame": {
+            "position": ((0, 100), (5, 30)),
+            "text": "<b>Wagenliste zum Frachtbrief</b>",
+            "text_style": paragraph_styles["title"],
+        },
+        "Bahnhof_frame": {
+            "position": ((0, 50), (35, 65)),
+            "text": "Bahnhof",
+            "text_style": paragraph_styles["description_center"],
+        },
+        "Unternehmen_frame": {
+            "position": ((50, 100), (35, 65)),
+            "text": "Unternehmen",
+            "text_style": paragraph_styles["description_center"],
+        },
+        "Versand_Nr_frame": {
+            "position": ((0, 50), (65, 95)),
+            "text": "Versand Nr.",
+            "text_style": paragraph_styles["description_center"],
+        },
+        "land_frame": {
+            "position": ((50, 100), (65, 95)),
+            "text": "Land",
+            "text_style": paragraph_styles["description_center"],
+        },
+    }
+
+    for key, value in frames_wagenliste.items():
+        dfs[key] = create_matrix(
+            recorder,
+            dfs["Wagenliste_frame"],
+            [value["position"]],
+            {**transparent_frame_params, **no_padding_frame_params},
+        )[0]
+
+        recorder.add_paragraphs(
+            dfs[key].frame_container.frame,
+            [Paragraph(value["text"], style=value["text_style"])],
+        )
+    values_header = {
+        "Bahnhof_value": {
+            "frame_parent": "Bahnhof_frame",
+            "position": ((0, 100), (moyd, 100)),
+            "text": dict_treated_values["Bahnhof"],
+            "text_style": paragraph_styles["description_center"],
+        },
+        "Unternehmen_value": {
+            "frame_parent": "Unternehmen_frame",
+            "position": ((0, 100), (moyd, 100)),
+            "text": dict_treated_values["Unternehmen"],
+            "text_style": paragraph_styles["description_center"],
+        },
+        "Versand_Nr_value": {
+            "frame_parent": "Versand_Nr_frame",
+            "position": ((0, 100), (moyd, 100)),
+            "text": dict_treated_values["Versand_Nr"],
+            "text_style": paragraph_styles["description_center"],
+        },
+        "Land_value": {
+            "frame_parent": "land_frame",
+            "position": ((0, 100), (moyd, 100)),
+            "text": dict_treated_values["Land"],
+            "text_style": paragraph_styles["description_center"],
+        },
+    }
+
+    for key, value in values_header.items():
+        dfs[key] = create_matrix(
+            recorder,
+            dfs[value["frame_parent"]],
+            [value["position"]],
+            {**transparent_frame_params, **no_padding_frame_params},
+        )[0]
+
+        header_layout.add_text_field(
+            name=f"to_be_centered_{key}",
+            value=value["text"].replace("<br/>", "\n"),
+            x=dfs[key].frame_container.start_x,
+            y=dfs[key].frame_container.start_y,
+            width=dfs[key].frame_container.width,
+            height=dfs[key].frame_container.height,
+            alignment=1,
+            **dict_text_field_header_value_params,
+        )
+
+    header_layout.height = dfs["Ort_frame"].end_y
+    return header_layout
+
+
+class PageLayout:
+    """Static skeleton of a report page and the frames of the wagon table.
+
+    The skeleton (main frame, header, table header, column borders and footer) is drawn once into a form XObject that every page
+    references. Only the text fields are added to each page.
+    """
+
+    def __init__(self, form_name: str) -> None:
+        self.form_name = form_name
+        self.recorder = CanvasRecorder()
+        self.text_fields = []
+        self.frames: dict[str, FrameComposite] = {}
+        self.rows = 0
+        self.total_rows = 1
+        self.cell_x: list[list[float]] = []
+        self.cell_y: list[list[float]] = []
+        self.cell_width: list[list[float]] = []
+        self.cell_height: list[list[float]] = []
+
+    def add_text_field(self, **kwargs) -> None:
+        self.text_fields.append(kwargs)
+
+    def define_form(self, c: canvas.Canvas, fillable: bool = True) -> None:
+        c.beginForm(self.form_name)
+        self.recorder.replay(c)
+        if not fillable:
+            # The header and footer values are the same on every page, so flattened they become part of the skeleton
+            for text_field in self.text_fields:
+                draw_field_text(c, **text_field)
+        c.endForm()
+
+    def draw(self, c: canvas.Canvas, fillable: bool = True) -> bool:
+        """Put the skeleton and the header and footer fields on the current page. Returns whether the skeleton form was defined."""
+        defined = not c.hasForm(self.form_name)
+        if defined:
+            self.define_form(c, fillable)
+        c.doForm(self.form_name)
+        if fillable:
+            # The header and footer values repeat on every page, each of them is a single field with a widget per page
+            for text_field in self.text_fields:
+                c.acroForm.textfield(shared=True, **text_field)
+        return defined
+
+
+def plan_page_layout(dict_treated_values: dict, header_layout: HeaderLayout | None, total_rows: int = 1) -> PageLayout:
+    page_layout = PageLayout("page_skeleton_header" if header_layout else "page_skeleton")
+    page_layout.total_rows = total_rows
+    recorder = page_layout.recorder
+    dfs = page_layout.frames
+
+    dfs["main_frame"] = FrameComposite(
+        recorder,
+        left_margin,
+        A4_width - right_margin,
+        bottom_margin,
+        A4_height - top_margin,
+        (1, 0, 0),
+        1,
+    )
+
+    if header_layout:
+        recorder.operations.extend(header_layout.recorder.operations)
+        page_layout.text_fields.extend(header_layout.text_fields)
+        offset_y_start_table = header_layout.height
+    else:
+        offset_y_start_table = 0
+
+    dfs["table_frame"] = dfs["main_frame"].add_frame(
+        recorder,
+        0,
+        dfs["main_frame"].frame_container.width,
+        offset_y_start_table,
+        dfs["main_frame"].frame_container.height - foot_height,
+        **{**solid_black_line_params, **no_padding_frame_params},
+    )
+
+    dfs["foot_frame"] = dfs["main_frame"].add_frame(
+        recorder,
+        0,
+        dfs["main_frame"].frame_container.width,
+        dfs["main_frame"].frame_container.height - foot_height,
+        dfs["main_frame"].frame_container.height,
+        **{**solid_black_line_params, **no_padding_frame_params},
+    )
+
+    left_foot, right_foot = create_matrix(
+        recorder,
+        dfs["foot_frame"],
+        [((0, 50), (0, 100)), ((50, 100), (0, 100))],
+        {**solid_black_line_params, "leftPadding": 5, "rightPadding": 5, "topPadding": 5, "bottomPadding": 5},
+    )
+
+    aux_top, aux_bottom = create_matrix(
+        recorder,
+        left_foot,
+        [((1.5, 100), (10, 45)), ((1, 100), (50, 100))],
+        {**transparent_frame_params, **no_padding_frame_params},
+    )
+
+    recorder.add_paragraphs(
+        aux_top.frame_container.frame,
+        [
+            Paragraph(" Ausstellung durch", style=paragraph_styles["description"]),
+        ],
+    )
+
+    page_layout.add_text_field(
+        name="Ausstellung_durch",
+        value=dict_treated_values["Ausstellung_durch"],
+        x=aux_bottom.frame_container.start_x,
+        y=aux_bottom.frame_container.start_y,
+        width=aux_bottom.frame_container.width,
+        height=aux_bottom.frame_container.height,
+        **dict_text_field_header_value_params,
+    )
+
+    aux_top, aux_bottom = create_matrix(
+        recorder,
+        right_foot,
+        [((1.5, 100), (10, 45)), ((1, 100), (50, 100))],
+        {**transparent_frame_params, **no_padding_frame_params},
+    )
+
+    recorder.add_paragraphs(
+        aux_top.frame_container.frame,
+        [
+            Paragraph("Ort, Datum und Unterschrift", style=paragraph_styles["description"]),
+        ],
+    )
+
+    date = dict_treated_values["date"]
+
+    page_layout.add_text_field(
+        name="Ort_Datum_Unterschrift",
+        value=f"Seekirchen am {date[0]} {date[1]} {date[2]}",
+        x=aux_bottom.frame_container.start_x,
+        y=aux_bottom.frame_container.start_y,
+        width=aux_bottom.frame_container.width,
+        height=aux_bottom.frame_container.height,
+        **dict_text_field_header_value_params,
+    )
+
+    bottom_frame = dfs["main_frame"].add_frame(
+        recorder,
+        0,
+        dfs["main_frame"].frame_container.width,
+        dfs["main_frame"].frame_container.height + 2,
+        dfs["main_frame"].frame_container.height + 20,
+        **{**transparent_frame_params, **no_padding_frame_params},
+    )
+
+    left_bottom, right_bottom = create_matrix(
+        recorder,
+        bottom_frame,
+        [((0, 50), (0, 100)), ((50, 100), (0, 100))],
+        {**transparent_frame_params, **no_padding_frame_params},
+    )
+
+    recorder.add_paragraphs(
+        left_bottom.frame_container.frame,
+        [
+            Paragraph("Nur für den kombinierten Verkehr", style=paragraph_styles["description"]),
+        ],
+    )
+
+    recorder.add_paragraphs(
+        right_bottom.frame_container.frame,
+        [
+            Paragraph("CIT-23", style=paragraph_styles["description_right"]),
+        ],
+    )
+
+    dfs["table_header_frame"] = dfs["table_frame"].add_frame(
+        recorder,
+        0,
+        dfs["table_frame"].frame_container.width,
+        0,
+        table_header_height,
+        **{**solid_black_line_params, **no_padding_frame_params},
+    )
+
+    dfs["table_body_frame"] = dfs["table_frame"].add_frame(
+        recorder,
+        0,
+        dfs["table_frame"].frame_container.width,
+        table_header_height,
+        dfs["table_frame"].frame_container.height,
+        **{**solid_black_line_params, **no_padding_frame_params},
+    )
+
+    for key, value in dict_col_params.items():
+        dfs[key + "_frame"] = create_matrix(
+            recorder,
+            dfs["table_header_frame"],
+            [(value["position"][0], (0, 100))],
+            {**solid_black_line_params, **no_padding_frame_params},
+        )[0]
+
+        dfs[key + "_frame_description"] = create_matrix(
+            recorder,
+            dfs[key + "_frame"],
+            [((0, 100), value["position"][1])],
+            {**transparent_frame_params, **no_padding_frame_params},
+        )[0]
+
+        dfs[key + "_table_values"] = create_matrix(
+            recorder,
+            dfs["table_body_frame"],
+            [(value["position"][0], (0, 100))],
+            {**solid_black_line_params, **no_padding_frame_params},
+        )[0]
+
+        aux = create_matrix(
+            recorder,
+            dfs[key + "_frame_description"],
+            [((0, 100), (0, 100))],
+            {**transparent_frame_params, **no_padding_frame_params},
+        )[0]
+        if key != "RID":
+            recorder.add_paragraphs(
+                aux.frame_container.frame,
+                [
+                    Paragraph(f"{value['col_name']}", style=paragraph_styles["description_center"]),
+                ],
+            )
+        else:
+            recorder.add_paragraphs(
+                aux.frame_container.frame,
+                [Paragraph(f"{aux}", style=paragraph_styles["description_center"]) for aux in value["col_name"]],
+            )
+
+    page_layout.rows = table_rows(offset_y_start_table, total_rows)
+    plan_table_cells(page_layout)
+
+    return page_layout
+
+
+def table_rows(header_height: float, total_rows: int = 1) -> int:
+    """Number of wagons that fit on a page below a header of the given height, keeping total_rows rows free for the sum lines."""
+    table_body_height = main_frame_height - header_height - foot_height - table_header_height
+    return int(table_body_height // line_height) - total_rows
+
+
+class PagePlan(NamedTuple):
+    wagons: range
+    header_height: float
+    rows: int
+    sum_row: bool
+
+
+def plan_pages(wagon_count: int, header_height: float, repeat_header: bool = True, total_rows: int = 1) -> list[PagePlan]:
+    """Split the wagons of a report into pages the way _create_report fills them, without laying out or drawing anything.
+
+    Args:
+        wagon_count (int): Number of wagons of the report.
+        header_height (float): Height of the header, e.g. plan_header_layout(...).height.
+        repeat_header (bool, optional): The header is on every page instead of only on the first one.
+        total_rows (int, optional): Rows kept free below the wagons of every page for the sum lines.
+
+    Returns:
+        list[PagePlan]: Per page the indexes of its wagons, the height of its header (0 without header), the number of wagon rows
+            the page holds and whether it has the Sum line.
+
+    """
+    pages = []
+    start = 0
+    while start < wagon_count:
+        page_header_height = header_height if repeat_header or start == 0 else 0
+        rows = table_rows(page_header_height, total_rows)
+        stop = min(start + rows, wagon_count)
+        pages.append(PagePlan(range(start, stop), page_header_height, rows, stop == wagon_count))
+        start = stop
+    return pages
+
+
+def plan_table_cells(page_layout: PageLayout) -> None:
+    """Compute the position and size of every cell of the wagon table in one pass.
+
+    The grid has one row per wagon on the page plus the rows of the sum lines, and one column per entry of dict_col_params. The
+    arithmetic mirrors FrameComposite.add_frame on the column frames, so the cells land exactly where those frames would be.
+    """
+    columns = [page_layout.frames[col_name + "_table_values"] for col_name in dict_col_params]
+    offset_x = np.array([column.start_x + column.offset_x for column in columns])
+    offset_y = np.array([column.start_y + column.offset_y for column in columns])
+    column_width = np.array([column.frame_container.width for column in columns])
+
+    start_y = np.arange(page_layout.rows + page_layout.total_rows)[:, np.newaxis] * line_height + 2
+    end_y = start_y + line_height
+
+    shape = (page_layout.rows + page_layout.total_rows, len(columns))
+    cell_x = np.broadcast_to(0 + offset_x, shape)
+    cell_y = A4_height - (end_y + offset_y)
+    cell_width = np.broadcast_to(np.abs((column_width + offset_x) - (0 + offset_x)), shape)
+    cell_height = np.abs((A4_height - (start_y + offset_y)) - cell_y)
+
+    page_layout.cell_x = cell_x.tolist()
+    page_layout.cell_y = cell_y.tolist()
+    page_layout.cell_width = cell_width.tolist()
+    page_layout.cell_height = cell_height.tolist()
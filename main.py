@@ -1,23 +1,73 @@
-from create_report import create_report
+from create_report import create_report, create_report_bytes, create_reports, plan_report
+from report_template import ReportTemplateCache
 from test_values import info_values, info_values_2, wagon_values
 
-# This creates a report with with some wagons. The report will have the same header in all pages
-create_report("report.pdf", wagon_values, info_values, repeat_header=True)
-create_report("report_2.pdf", wagon_values, info_values_2, repeat_header=True)
 
-# Same as before but the header will be only in the first page
-create_report("report_no_header.pdf", wagon_values, info_values, repeat_header=False)
+def main() -> None:
+    """Create the example reports in the working directory."""
+    # This creates a report with with some wagons. The report will have the same header in all pages
+    create_report("report.pdf", wagon_values, info_values, repeat_header=True)
+    create_report("report_2.pdf", wagon_values, info_values_2, repeat_header=True)
 
-# This creates a report totally empty with 100 wagons to be filled by the user
-create_report("report_empty.pdf", 100, {}, repeat_header=False)
+    # Same as before but the header will be only in the first page
+    create_report("report_no_header.pdf", wagon_values, info_values, repeat_header=False)
 
-# This creates a report with only one wagon
-create_report("report_one_wagon.pdf", wagon_values[:1], info_values, repeat_header=True)
+    # This creates a report totally empty with 100 wagons to be filled by the user
+    create_report("report_empty.pdf", 100, {}, repeat_header=False)
 
-# This creates a report with many wagons with header in all pages
-create_report("report_many_wagons.pdf", wagon_values * 10, info_values, repeat_header=True)
+    # This creates a report with only one wagon
+    create_report("report_one_wagon.pdf", wagon_values[:1], info_values, repeat_header=True)
 
+    # This creates a report with many wagons with header in all pages
+    create_report("report_many_wagons.pdf", wagon_values * 10, info_values, repeat_header=True)
 
-# Next two files will not be created because number of wagons is less than 1
-create_report("report_no_wagons.pdf", [], {})
-create_report("report_no_wagons_2.pdf", 0, {})
+    # Next two files will not be created because number of wagons is less than 1
+    create_report("report_no_wagons.pdf", [], {})
+    create_report("report_no_wagons_2.pdf", 0, {})
+
+    # Very large reports can be written page by page, which keeps the memory bounded by a single page
+    create_report("report_many_wagons_flushed.pdf", wagon_values * 10, info_values, repeat_header=True, flush_pages=True)
+
+    # Without Sum_masses the sums are computed from the wagons. Every page can also show its own sums and the sums carried forward
+    info_values_without_sums = {key: value for key, value in info_values.items() if key != "Sum_masses"}
+    create_report("report_page_totals.pdf", wagon_values * 10, info_values_without_sums, repeat_header=True, page_totals=True)
+
+    # Wagons can also be given column by column, e.g. as a dict of lists or a NumPy structured array, without a dict per wagon
+    wagon_columns = {key: [wagon[key] for wagon in wagon_values] for key in wagon_values[0]}
+    create_report("report_columns.pdf", wagon_columns, info_values, repeat_header=True)
+
+    # Archival copy: the values are drawn as page text, without form fields, which gives a much smaller file
+    create_report("report_many_wagons_archive.pdf", wagon_values * 10, info_values, repeat_header=True, fillable=False)
+
+    # The report can also be rendered in memory, e.g. to send it over HTTP without touching the disk
+    pdf_bytes = create_report_bytes(wagon_values, info_values, repeat_header=True)
+    print(f"Report in memory: {len(pdf_bytes)} bytes")
+
+    # The pages of a report can be planned without rendering it, e.g. to estimate its size before creating it
+    page_plan = plan_report(wagon_values * 10, info_values, repeat_header=True)
+    print(f"Planned report: {len(page_plan)} pages")
+
+    # Reports with the same layout are filled into a template kept from the first one instead of being drawn again
+    template_cache = ReportTemplateCache()
+    template_cache.create_report("report_template_1.pdf", wagon_values * 10, info_values, repeat_header=True)
+    template_cache.create_report("report_template_2.pdf", wagon_values[::-1] * 10, info_values, repeat_header=True)
+
+    # Many reports can be created at the same time on a process pool
+    results = create_reports(
+        [
+            ("report_batch_1.pdf", wagon_values, info_values, True),
+            ("report_batch_2.pdf", wagon_values * 10, info_values_2, False),
+            (None, wagon_values[:1], info_values),
+        ],
+        workers=3,
+    )
+    for result in results:
+        print(f"Batch report {result.filename}: {'ok' if result.success else result.error or 'failed'}")
+
+    # A single very large report can be rendered in parts on several processes and merged into one document
+    create_report("report_parallel.pdf", wagon_values * 100, info_values, repeat_header=True, workers=4)
+
+
+# The process pools of the examples import this module again in their workers on platforms that spawn them
+if __name__ == "__main__":
+    main()
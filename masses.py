@@ -0,0 +1,77 @@
+import logging
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+
+from global_vars import list_mass_keys
+from wagon_columns import WagonColumns
+
+
+class MassTotals:
+    """Sums of the masses of some wagons, one per entry of list_mass_keys, with the number of values given in every column.
+
+    A column with no values gives an empty sum, e.g. in a report to be filled in by hand, and a column with a value that is not a
+    mass gives an empty sum as well, instead of a wrong one.
+    """
+
+    __slots__ = ("counts", "values")
+
+    def __init__(self, values: np.ndarray | None = None, counts: np.ndarray | None = None) -> None:
+        self.values = np.zeros(len(list_mass_keys)) if values is None else values
+        self.counts = np.zeros(len(list_mass_keys), dtype=np.int64) if counts is None else counts
+
+    def __add__(self, other: "MassTotals") -> "MassTotals":
+        return MassTotals(self.values + other.values, self.counts + other.counts)
+
+    def formatted(self) -> list[str]:
+        """Sums written like the wagon values, with spaces between the groups of thousands, e.g. ["560 380", "158 430", "718 810"]."""
+        return [
+            f"{int(value):,}".replace(",", " ") if count and not np.isnan(value) else ""
+            for value, count in zip(self.values, self.counts, strict=True)
+        ]
+
+
+def sum_masses(rows: Sequence[Sequence]) -> MassTotals:
+    """Sum the masses of the given rows in one vectorized pass.
+
+    Args:
+        rows (Sequence[Sequence]): Per wagon its values of list_mass_keys, as strings grouped with spaces like "68 500" or as numbers.
+            Empty strings are left out of the sums.
+
+    Returns:
+        MassTotals: Sums of the columns.
+
+    """
+    if len(rows) == 0:
+        return MassTotals()
+
+    # The strings are read as a block of code points: digits make the value, spaces and the padding of shorter strings are skipped
+    text = np.asarray(rows, dtype=str).reshape(-1, len(list_mass_keys))
+    chars = text.view(np.uint32).reshape(*text.shape, -1)
+    is_digit = (chars >= ord("0")) & (chars <= ord("9"))
+    invalid = (~is_digit & (chars != ord(" ")) & (chars != 0)).any(axis=-1)
+    given = is_digit.any(axis=-1) | invalid
+
+    digits_after = np.cumsum(is_digit[..., ::-1], axis=-1)[..., ::-1] - is_digit
+    values = (np.where(is_digit, chars - ord("0"), 0) * 10.0**digits_after).sum(axis=-1)
+
+    if invalid.any():
+        values[invalid] = np.nan
+        for col_idx in np.flatnonzero(invalid.any(axis=0)):
+            invalid_rows = np.flatnonzero(invalid[:, col_idx])
+            logging.error(
+                f"{list_mass_keys[col_idx]}: {len(invalid_rows)} of the values are not a mass in kg, the first is {rows[invalid_rows[0]][col_idx]!r}. "
+                "The sum of the column is left empty"
+            )
+    return MassTotals(values.sum(axis=0), given.sum(axis=0))
+
+
+def mass_rows(wagon_values: Iterable[dict]) -> list[list] | np.ndarray:
+    if isinstance(wagon_values, WagonColumns):
+        return wagon_values.mass_rows()
+    return [[wagon[key] for key in list_mass_keys] for wagon in wagon_values]
+
+
+def mass_totals(wagon_values: Iterable[dict]) -> list[str]:
+    """Sums of the masses of all wagons as they are printed in the Sum line, e.g. ["560 380", "158 430", "718 810"]."""
+    return sum_masses(mass_rows(wagon_values)).formatted()
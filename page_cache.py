@@ -0,0 +1,99 @@
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from typing import BinaryIO
+
+import numpy as np
+
+from create_report import get_treated_values, render_pages, report_filename
+from layout import PagePlan, plan_header_layout, plan_pages
+from masses import mass_totals
+from pdf_writer import IncrementalPdfWriter, PdfRecording
+from wagon_columns import update_row_digest, wagon_sequence
+
+
+def page_key(page: PagePlan, wagons: list[dict], report_values: str, sum_masses: list[str]) -> str:
+    """Digest of everything a page depends on: its wagons, its first row number, its header, the report values and the Sum line."""
+    digest = hashlib.sha256(report_values.encode())
+    digest.update(json.dumps([page.wagons.start, page.header_height, page.sum_row, sum_masses if page.sum_row else None]).encode())
+    update_row_digest(digest, wagons[page.wagons.start : page.wagons.stop])
+    return digest.hexdigest()
+
+
+class PageCache:
+    """Rendered pages kept in memory, so that a report created again after a correction only renders the pages that changed.
+
+    Every page is rendered on its own and kept under the digest of its inputs: its wagons, its first row number, the header and footer
+    values and, on the last page, the sums. Creating a report assembles the kept pages with the pages that had to be rendered, e.g.
+    correcting the mass of one wagon renders its page and the last page with the sums again. Pages are kept as recordings of the
+    writer, so a kept page is appended without being parsed or formatted again.
+
+    Args:
+        max_bytes (int, optional): Total size of the kept pages. The least recently used pages are dropped when there are more.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20) -> None:
+        self.max_bytes = max_bytes
+        self.pages: OrderedDict[str, PdfRecording] = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _store(self, key: str, recording: PdfRecording) -> None:
+        self.pages[key] = recording
+        self.size_bytes += recording.size
+        while self.size_bytes > self.max_bytes:
+            self.size_bytes -= self.pages.popitem(last=False)[1].size
+
+    def create_report(
+        self,
+        filename: str | BinaryIO,
+        wagon_values: Iterable[dict] | Mapping[str, Sequence] | np.ndarray | int,
+        info_values: dict,
+        repeat_header: bool = True,
+        fillable: bool = True,
+        progress: Callable[[int], None] | None = None,
+    ) -> int:
+        """Create a report like create_report in large report mode, reusing the kept pages whose inputs did not change."""
+        filename = report_filename(filename)
+        wagons = wagon_sequence(wagon_values)
+        if wagons is None:
+            return 0
+
+        dict_treated_values = get_treated_values(info_values)
+        if dict_treated_values["Sum_masses"] is None:
+            dict_treated_values["Sum_masses"] = mass_totals(wagons)
+        sum_masses = dict_treated_values["Sum_masses"]
+        # The sums only show on the last page, so they are left out of the values shared by all pages
+        report_values = json.dumps(
+            [{key: value for key, value in dict_treated_values.items() if key != "Sum_masses"}, repeat_header, fillable],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+
+        writer = IncrementalPdfWriter(filename, progress)
+        try:
+            for page in plan_pages(len(wagons), plan_header_layout(dict_treated_values).height, repeat_header):
+                key = page_key(page, wagons, report_values, sum_masses)
+                recording = self.pages.get(key)
+                if recording is not None:
+                    self.hits += 1
+                    self.pages.move_to_end(key)
+                else:
+                    self.misses += 1
+                    page_wagons = wagons[page.wagons.start : page.wagons.stop]
+                    recording = IncrementalPdfWriter.record(
+                        render_pages(page_wagons, dict_treated_values, repeat_header, fillable, page.wagons.start, page.sum_row)
+                    )
+                    self._store(key, recording)
+                writer.add_recording(recording)
+            writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+
+        if isinstance(filename, str):
+            logging.info(f"File created: {filename}")
+        return 1
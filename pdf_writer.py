@@ -0,0 +1,333 @@
+import hashlib
+import io
+import os
+import uuid
+from collections.abc import Callable
+from typing import BinaryIO, NamedTuple
+
+from pdfrw import PdfDict, PdfName, PdfReader
+from pdfrw.pdfwriter import user_fmt
+
+
+class PdfRecording(NamedTuple):
+    """Objects of a rendered document in the order add_pdf writes them, with symbolic references. See IncrementalPdfWriter.record."""
+
+    pages_number: int
+    events: list[tuple]
+    size: int
+
+
+class IncrementalPdfWriter:
+    """Write a PDF page by page to a binary stream.
+
+    Pages are taken from small rendered documents (usually one page each) and their objects are written out immediately.
+    Only the cross-reference offsets, the page and field references and the digests of shared objects are kept in memory, so
+    memory does not grow with the size of the page content. Identical shared objects (fonts, the page skeleton form, appearance
+    streams) are written only once, and fields shared by several pages become one field with the widgets of all pages.
+
+    A document written to a path is written to a temporary file next to it first, which replaces the path when the document is
+    closed. A report that fails or is cancelled on the way never leaves a partial file under its name.
+    """
+
+    def __init__(
+        self,
+        output: str | BinaryIO,
+        progress: Callable[[int], None] | None = None,
+        start: tuple[bytes, list[int | None]] | None = None,
+    ) -> None:
+        self._owns_stream = isinstance(output, str)
+        self.path = output if self._owns_stream else None
+        self._temp_path = f"{output}.{uuid.uuid4().hex[:8]}.tmp" if self._owns_stream else None
+        self.stream = open(self._temp_path, "xb") if self._owns_stream else output
+        self.progress = progress
+        self.bytes_written = 0
+        self.offsets: list[int | None] = []
+        self.page_numbers: list[int] = []
+        self.field_numbers: list[int] = []
+        self._field_number_set: set[int] = set()
+        # Fields with widgets on several pages, by name: number, entries and the numbers of the widgets found so far
+        self.shared_fields: dict[str, tuple[int, str, list[int]]] = {}
+        self.acroform_entries: str | None = None
+        # Document information of the first document added, e.g. the producer and the creation date
+        self.info_entries: str | None = None
+        # Digest of the bytes written, which gives the document its /ID
+        self._digest = hashlib.md5(usedforsecurity=False)
+        self._shared: dict[bytes, int] = {}
+        self._numbers: dict[int, int] = {}
+        self._visiting: dict[int, int | None] = {}
+        # While recording, see record, objects are kept as events instead of being written
+        self._recording: list[tuple] | None = None
+
+        if start is None:
+            self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+            self.pages_number = self.reserve()
+        else:
+            # The document continues the beginning written by another writer, see snapshot
+            data, offsets = start
+            self._write(data)
+            self.offsets = list(offsets)
+            self.pages_number = 1
+
+    def _write(self, data: bytes) -> None:
+        self.stream.write(data)
+        self._digest.update(data)
+        self.bytes_written += len(data)
+
+    def _new_number(self) -> int:
+        self.offsets.append(None)
+        return len(self.offsets)
+
+    def reserve(self) -> int:
+        """Reserve the number of an object that is written later with write_object."""
+        number = self._new_number()
+        if self._recording is not None:
+            self._recording.append(("reserve", number))
+        return number
+
+    def write_object(self, number: int, body: str) -> None:
+        """Write the body of an object, e.g. "<</Type /Annot ...>>", under a reserved number."""
+        if self._recording is not None:
+            self._recording.append(("write", number, self._split(body)))
+            return
+        self.offsets[number - 1] = self.bytes_written
+        self._write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+
+    def _write_shared(self, body: str) -> int:
+        """Write an object that is written only once however often it occurs, and return its number."""
+        digest = hashlib.sha1(body.encode("latin-1"), usedforsecurity=False).digest()
+        number = self._shared.get(digest)
+        if number is None:
+            number = self._new_number()
+            self._shared[digest] = number
+            if self._recording is not None:
+                self._recording.append(("shared", number, self._split(body)))
+            else:
+                self.write_object(number, body)
+        return number
+
+    def _ref(self, number: int) -> str:
+        # Recorded references are marked with NUL characters, which formatted PDF values never contain outside of stream data
+        if self._recording is not None:
+            return f"\x00{number}\x00"
+        return f"{number} 0 R"
+
+    @staticmethod
+    def _split(body: str) -> list:
+        """Split a recorded body into text and the numbers it refers to, alternating and starting with text."""
+        head, separator, stream = body.partition("\nstream\n")
+        parts: list = head.split("\x00")
+        parts[1::2] = [int(number) for number in parts[1::2]]
+        parts[-1] += separator + stream
+        return parts
+
+    def _number(self, obj) -> int:
+        key = id(obj)
+        if key in self._numbers:
+            return self._numbers[key]
+        if key in self._visiting:
+            # Back reference to an object being formatted: it needs its number before it is written
+            if self._visiting[key] is None:
+                self._visiting[key] = self.reserve()
+            return self._visiting[key]
+
+        self._visiting[key] = None
+        body = self._format_direct(obj)
+        number = self._visiting.pop(key)
+
+        if number is None and not (isinstance(obj, PdfDict) and obj.Type in (PdfName.Annot, PdfName.Page)):
+            number = self._write_shared(body)
+        else:
+            number = number or self.reserve()
+            self.write_object(number, body)
+
+        self._numbers[key] = number
+        return number
+
+    def format(self, obj) -> str:
+        """Format a pdfrw value as it appears inside another object. The indirect objects it refers to are written on the way."""
+        if isinstance(obj, PdfDict):
+            if obj.indirect or obj.stream is not None:
+                return self._ref(self._number(obj))
+        elif getattr(obj, "indirect", False):
+            return self._ref(self._number(obj))
+        return self._format_direct(obj)
+
+    def _format_direct(self, obj) -> str:
+        if isinstance(obj, PdfDict):
+            items = " ".join(f"{key} {self.format(value)}" for key, value in obj.iteritems() if key != PdfName.Parent or obj.Type != PdfName.Page)
+            if obj.Type == PdfName.Page:
+                items += f" /Parent {self._ref(self.pages_number)}"
+            if obj.stream is not None:
+                return f"<<{items}>>\nstream\n{obj.stream}\nendstream"
+            return f"<<{items}>>"
+        if isinstance(obj, list):
+            return "[" + " ".join(self.format(value) for value in obj) + "]"
+        if isinstance(obj, dict):
+            return self._format_direct(PdfDict(obj))
+        if hasattr(obj, "indirect"):
+            return str(getattr(obj, "encoded", None) or obj)
+        return user_fmt(obj)
+
+    def snapshot(self) -> tuple[bytes, list[int | None]]:
+        """Beginning of the document written so far, to start other documents with the same objects. The output must be a BytesIO."""
+        return self.stream.getvalue(), list(self.offsets)
+
+    def add_pdf(self, pdf: PdfReader | bytes) -> None:
+        """Append all pages of a rendered document, together with their form fields."""
+        if isinstance(pdf, bytes):
+            pdf = PdfReader(fdata=pdf)
+
+        # Object ids are only meaningful while this document is alive
+        self._numbers = {}
+
+        acroform = pdf.Root.AcroForm
+        if acroform is not None and self.acroform_entries is None:
+            self.acroform_entries = " ".join(f"{key} {self.format(value)}" for key, value in acroform.iteritems() if key != PdfName.Fields)
+            if self._recording is not None:
+                self._recording.append(("acroform", self._split(self.acroform_entries)))
+
+        if pdf.Info is not None and self.info_entries is None:
+            self.info_entries = " ".join(f"{key} {self.format(value)}" for key, value in pdf.Info.iteritems())
+            if self._recording is not None:
+                self._recording.append(("info", self._split(self.info_entries)))
+
+        for page in pdf.pages:
+            # Every document has its own copy of the shared fields, the widgets of all the copies are gathered under a single field
+            for annotation in page.Annots or []:
+                field = annotation.Parent
+                if field is not None and field.Kids is not None and field.T is not None:
+                    if field.T not in self.shared_fields:
+                        entries = " ".join(f"{key} {self.format(value)}" for key, value in field.iteritems() if key != PdfName.Kids)
+                        self.shared_fields[field.T] = (self._new_number(), entries, [])
+                        if self._recording is not None:
+                            self._recording.append(("shared_field", str(field.T), self.shared_fields[field.T][0], self._split(entries)))
+                    self._numbers[id(field)] = self.shared_fields[field.T][0]
+
+            # Annotations point back to their page, so the page number is known before its content is formatted
+            page_number = self.reserve()
+            self._numbers[id(page)] = page_number
+            self.write_object(page_number, self._format_direct(page))
+            self._add_page(page_number)
+
+            for annotation in page.Annots or []:
+                if annotation.Parent is not None and annotation.Parent.T in self.shared_fields:
+                    self._add_kid(annotation.Parent.T, self._numbers[id(annotation)])
+                field = annotation
+                while field.Parent is not None:
+                    field = field.Parent
+                if field.T is not None:
+                    self._add_field(self._number(field))
+
+        if self.progress:
+            self.progress(self.bytes_written)
+
+    def _add_page(self, number: int) -> None:
+        if self._recording is not None:
+            self._recording.append(("page", number))
+        self.page_numbers.append(number)
+
+    def _add_kid(self, name: str, number: int) -> None:
+        if self._recording is not None:
+            self._recording.append(("kid", str(name), number))
+        self.shared_fields[name][2].append(number)
+
+    def _add_field(self, number: int) -> None:
+        if self._recording is not None:
+            self._recording.append(("field", number))
+        if number not in self._field_number_set:
+            self._field_number_set.add(number)
+            self.field_numbers.append(number)
+
+    @classmethod
+    def record(cls, pdf: PdfReader | bytes) -> PdfRecording:
+        """Format the objects of a rendered document once, so that add_recording can append it to any number of documents.
+
+        add_recording writes the same bytes as add_pdf would, without parsing and formatting the document again.
+        """
+        recorder = cls(io.BytesIO())
+        recorder._recording = []
+        recorder.add_pdf(pdf)
+        size = sum(len(part) for event in recorder._recording if isinstance(event[-1], list) for part in event[-1][::2])
+        return PdfRecording(recorder.pages_number, recorder._recording, size)
+
+    def add_recording(self, recording: PdfRecording) -> None:
+        """Append all pages of a recorded document, together with their form fields. See record."""
+        numbers = {recording.pages_number: self.pages_number}
+
+        def body(parts: list) -> str:
+            return "".join(f"{numbers[part]} 0 R" if idx % 2 else part for idx, part in enumerate(parts))
+
+        for kind, *event in recording.events:
+            if kind == "reserve":
+                numbers[event[0]] = self.reserve()
+            elif kind == "write":
+                self.write_object(numbers[event[0]], body(event[1]))
+            elif kind == "shared":
+                numbers[event[0]] = self._write_shared(body(event[1]))
+            elif kind == "acroform":
+                if self.acroform_entries is None:
+                    self.acroform_entries = body(event[0])
+            elif kind == "info":
+                if self.info_entries is None:
+                    self.info_entries = body(event[0])
+            elif kind == "shared_field":
+                name, number, parts = event
+                if name not in self.shared_fields:
+                    self.shared_fields[name] = (self._new_number(), body(parts), [])
+                numbers[number] = self.shared_fields[name][0]
+            elif kind == "page":
+                self._add_page(numbers[event[0]])
+            elif kind == "kid":
+                self._add_kid(event[0], numbers[event[1]])
+            elif kind == "field":
+                self._add_field(numbers[event[0]])
+
+        if self.progress:
+            self.progress(self.bytes_written)
+
+    def abort(self) -> None:
+        """Stop without finishing the document. When the writer opened the output, it is closed and the partial document deleted."""
+        if self._owns_stream:
+            self.stream.close()
+            try:
+                os.remove(self._temp_path)
+            except FileNotFoundError:
+                pass
+
+    def close(self) -> int:
+        """Write the page tree, the form, the catalog and the cross-reference table. Returns the total number of bytes written."""
+        kids = " ".join(f"{number} 0 R" for number in self.page_numbers)
+        self.write_object(self.pages_number, f"<</Type /Pages /Count {len(self.page_numbers)} /Kids [{kids}]>>")
+
+        for number, entries, kids in self.shared_fields.values():
+            self.write_object(number, f"<<{entries} /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}]>>")
+
+        catalog = f"/Type /Catalog /Pages {self.pages_number} 0 R"
+        if self.field_numbers:
+            fields = " ".join(f"{number} 0 R" for number in self.field_numbers)
+            acroform_number = self.reserve()
+            self.write_object(acroform_number, f"<<{self.acroform_entries or ''} /Fields [{fields}]>>")
+            catalog += f" /AcroForm {acroform_number} 0 R"
+        catalog_number = self.reserve()
+        self.write_object(catalog_number, f"<<{catalog}>>")
+
+        info = ""
+        if self.info_entries is not None:
+            info_number = self.reserve()
+            self.write_object(info_number, f"<<{self.info_entries}>>")
+            info = f" /Info {info_number} 0 R"
+        document_id = self._digest.hexdigest()
+        trailer = f"/Size {len(self.offsets) + 1} /Root {catalog_number} 0 R{info} /ID [<{document_id}><{document_id}>]"
+
+        xref_offset = self.bytes_written
+        xref = [f"xref\n0 {len(self.offsets) + 1}\n", "0000000000 65535 f \n"]
+        xref.extend(f"{offset:010d} 00000 n \n" for offset in self.offsets)
+        xref.append(f"trailer\n<<{trailer}>>\nstartxref\n{xref_offset}\n%%EOF\n")
+        self._write("".join(xref).encode("latin-1"))
+
+        if self._owns_stream:
+            self.stream.close()
+            os.replace(self._temp_path, self.path)
+        if self.progress:
+            self.progress(self.bytes_written)
+        return self.bytes_written
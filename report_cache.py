@@ -0,0 +1,185 @@
+import hashlib
+import io
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping, Sequence
+from functools import lru_cache
+from typing import BinaryIO
+
+import numpy as np
+import reportlab
+
+from create_report import create_report, get_treated_values, report_filename, write_report
+from global_vars import list_wagon_necessary_keys
+from wagon_columns import update_row_digest, wagon_sequence
+
+# Modules whose code decides how a report looks. A change in any of them gives new cache keys
+layout_modules = ["create_report", "global_vars", "layout", "masses", "pdf_writer", "text_metrics", "utils", "wagon_columns"]
+
+# Temporary files older than this are left over from interrupted writes and are deleted
+stale_temp_seconds = 3600
+
+
+@lru_cache(maxsize=1)
+def layout_fingerprint() -> str:
+    """Digest of the reportlab version and of the code of the layout modules."""
+    digest = hashlib.sha256(reportlab.Version.encode())
+    for module_name in layout_modules:
+        with open(sys.modules[module_name].__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def report_key(wagons: list[dict] | int, info_values: dict, repeat_header: bool, fillable: bool) -> str:
+    """Stable digest of everything a report depends on.
+
+    Wagons are reduced to the text of their table columns and info values to their treated form, so inputs that give the same report
+    give the same key, e.g. a number of empty rows and the same number of wagons with empty values.
+    """
+    digest = hashlib.sha256(layout_fingerprint().encode())
+    treated_values = get_treated_values(info_values)
+    digest.update(json.dumps([treated_values, repeat_header, fillable], sort_keys=True, ensure_ascii=False).encode())
+
+    if isinstance(wagons, int):
+        wagons = itertools.repeat({key: "" for key in list_wagon_necessary_keys}, wagons)
+    update_row_digest(digest, wagons)
+    return digest.hexdigest()
+
+
+class ReportCache:
+    """Finished reports stored in a directory under the digest of their values, so that the same report is only rendered once.
+
+    Reprints, retries and duplicate requests are answered with the stored PDF. When the stored reports take more than max_bytes,
+    the least recently used ones are deleted. Reports rendered with another version of the layout code are never reused.
+
+    Several processes may share the directory. The stored reports and their sizes are read from the directory before deleting
+    any, a report deleted by another process is a miss, and temporary files left by interrupted writes are cleaned up.
+
+    Args:
+        directory (str): Directory of the stored reports. Created when missing, the reports already in it are reused.
+        max_bytes (int, optional): Total size of the stored reports.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 2**20) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+        # Stored reports by key with their size, least recently used first
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self.size_bytes = 0
+        self._scan()
+        self._evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def _scan(self) -> None:
+        """Read the stored reports from the directory, by last use, and delete stale temporary files."""
+        stored = []
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+                if entry.name.endswith(".pdf"):
+                    stored.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+                elif entry.name.endswith(".tmp") and now - stat.st_mtime > stale_temp_seconds:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+        self._entries = OrderedDict((key, size) for _, key, size in sorted(stored))
+        self.size_bytes = sum(self._entries.values())
+
+    def _evict(self) -> None:
+        while self.size_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self.size_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def _read(self, key: str) -> bytes | None:
+        # Other processes may share the directory, so the files decide and the index follows them
+        path = self._path(key)
+        try:
+            os.utime(path)
+            with open(path, "rb") as f:
+                pdf_data = f.read()
+        except FileNotFoundError:
+            self.size_bytes -= self._entries.pop(key, 0)
+            return None
+        self.size_bytes += len(pdf_data) - self._entries.get(key, 0)
+        self._entries[key] = len(pdf_data)
+        self._entries.move_to_end(key)
+        return pdf_data
+
+    def _store(self, key: str, pdf_data: bytes) -> None:
+        if len(pdf_data) > self.max_bytes:
+            return
+        # Written under a temporary name first, so that other processes never see a partial report
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf_data)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        # The reports of the other processes count as well, so the sizes are read again before deleting the least recently used
+        self._scan()
+        self._evict()
+
+    def create_report_bytes(
+        self,
+        wagon_values: Iterable[dict] | Mapping[str, Sequence] | np.ndarray | int,
+        info_values: dict,
+        repeat_header: bool = True,
+        fillable: bool = True,
+    ) -> bytes:
+        """Like create_report_bytes, from the cache when the same report was created before."""
+        wagons = wagon_values if isinstance(wagon_values, int) else wagon_sequence(wagon_values)
+        if wagons is None:
+            return b""
+        key = report_key(wagons, info_values, repeat_header, fillable)
+
+        pdf_data = self._read(key)
+        if pdf_data is not None:
+            self.hits += 1
+            return pdf_data
+
+        self.misses += 1
+        buffer = io.BytesIO()
+        if not create_report(buffer, wagons, info_values, repeat_header, fillable=fillable):
+            return b""
+        self._store(key, buffer.getvalue())
+        return buffer.getvalue()
+
+    def create_report(
+        self,
+        filename: str | BinaryIO,
+        wagon_values: Iterable[dict] | Mapping[str, Sequence] | np.ndarray | int,
+        info_values: dict,
+        repeat_header: bool = True,
+        fillable: bool = True,
+    ) -> int:
+        """Like create_report, from the cache when the same report was created before."""
+        filename = report_filename(filename)
+        pdf_data = self.create_report_bytes(wagon_values, info_values, repeat_header, fillable)
+        if not pdf_data:
+            return 0
+        write_report(filename, pdf_data)
+        return 1
+
+    def stats(self) -> dict[str, int]:
+        """Hits, misses and evictions so far, and the number and total size of the stored reports."""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "reports": len(self._entries), "size_bytes": self.size_bytes}
@@ -0,0 +1,63 @@
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+
+_no_phase = nullcontext()
+
+
+class ReportStats:
+    """Timings and counters collected while a report is created.
+
+    Give an instance to create_report to find out where the time goes. Phase durations are summed over all pages, page durations are
+    kept per page, and the counters hold the frames and paragraphs drawn into the page skeletons and the fields put on the pages.
+    A skeleton is drawn once per document and reused by its pages, in large report mode once per page. When no instance is given
+    nothing is measured.
+
+    Args:
+        callback (Callable[[str, float], None], optional): Called with the name and the value of every measurement as soon as it is
+            taken, e.g. to forward it to a metrics system. Phases are reported as "phase.<name>" in seconds, pages as "page" in seconds
+            and counters as "count.<name>".
+    """
+
+    def __init__(self, callback: Callable[[str, float], None] | None = None) -> None:
+        self.callback = callback
+        self.phases: dict[str, float] = {}
+        self.page_times: list[float] = []
+        self.counts: dict[str, int] = {"pages": 0, "frames": 0, "paragraphs": 0, "fields": 0}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + duration
+            if self.callback:
+                self.callback(f"phase.{name}", duration)
+
+    def add_page(self, duration: float) -> None:
+        self.page_times.append(duration)
+        self.count("pages")
+        if self.callback:
+            self.callback("page", duration)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + amount
+        if self.callback:
+            self.callback(f"count.{name}", amount)
+
+    def as_dict(self) -> dict[str, float]:
+        """Flat mapping of all measurements, e.g. {"phase.table_rows": 0.41, "count.fields": 1229, "page.max": 0.09}."""
+        stats = {f"phase.{name}": duration for name, duration in self.phases.items()}
+        stats.update({f"count.{name}": count for name, count in self.counts.items()})
+        if self.page_times:
+            stats["page.total"] = sum(self.page_times)
+            stats["page.mean"] = stats["page.total"] / len(self.page_times)
+            stats["page.max"] = max(self.page_times)
+        return stats
+
+
+def phase(stats: ReportStats | None, name: str):
+    """Context manager timing a phase into stats, or doing nothing when stats is None."""
+    return stats.phase(name) if stats is not None else _no_phase
@@ -0,0 +1,246 @@
+import io
+import logging
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping, Sequence
+from typing import BinaryIO, NamedTuple
+
+import numpy as np
+from pdfrw import PdfName, PdfReader, PdfString
+from reportlab.pdfbase.acroform import AcroForm
+
+from create_report import create_report, get_treated_values, report_filename, write_report
+from global_vars import dict_col_params, list_mass_keys
+from layout import HeaderLayout, plan_header_layout, plan_page_layout
+from masses import mass_totals
+from pdf_writer import IncrementalPdfWriter
+from utils import field_appearance
+from wagon_columns import wagon_sequence
+
+# Standard font of every form font name used in appearance streams, e.g. "Helv" -> "Helvetica"
+form_font_names = {short_name: name for name, short_name in AcroForm.formFontNames.items()}
+
+
+class _WidgetSlot(NamedTuple):
+    name: str
+    shared: bool
+    entries: str
+    width: float
+    height: float
+    resources: str
+    font_name: str
+    form_font_name: str
+    font_size: float
+    text_fill: str
+    multiline: bool
+    alignment: int
+
+
+class ReportTemplate:
+    """Fillable report of one layout, kept as ready to write PDF pieces.
+
+    The page skeletons, the fonts and the geometry of the fields are serialized once when the template is built from a rendered
+    report. Filling the template with the values of another report of the same layout only writes the fields, their values and
+    their appearance streams, which is much cheaper than drawing the report again.
+    """
+
+    def __init__(self, pdf_data: bytes) -> None:
+        pdf = PdfReader(fdata=pdf_data)
+        writer = IncrementalPdfWriter(io.BytesIO())
+
+        self.pages: list[tuple[str, list[_WidgetSlot]]] = []
+        self.shared_fields: dict[str, str] = {}
+        resources: dict[int, str] = {}
+        for page in pdf.pages:
+            page_entries = " ".join(f"{key} {writer.format(value)}" for key, value in page.iteritems() if key not in (PdfName.Annots, PdfName.Parent))
+
+            widgets = []
+            for annotation in page.Annots or []:
+                shared = annotation.Parent is not None
+                field = annotation.Parent if shared else annotation
+                name = field.T.to_unicode()
+                if shared and name not in self.shared_fields:
+                    self.shared_fields[name] = " ".join(
+                        f"{key} {writer.format(value)}" for key, value in field.iteritems() if key not in (PdfName.Kids, PdfName.V, PdfName.DV)
+                    )
+
+                x1, y1, x2, y2 = (float(value) for value in annotation.Rect)
+                form_font_name, font_size, _, *text_fill = (annotation.DA or field.DA).to_unicode().split()
+                appearance_resources = annotation.AP.N.Resources
+                if id(appearance_resources) not in resources:
+                    resources[id(appearance_resources)] = writer.format(appearance_resources)
+
+                # The page, the parent, the value and the appearance are written anew by every fill
+                entries = " ".join(
+                    f"{key} {writer.format(value)}"
+                    for key, value in annotation.iteritems()
+                    if key not in (PdfName.P, PdfName.Parent, PdfName.V, PdfName.DV, PdfName.AP)
+                )
+
+                widgets.append(
+                    _WidgetSlot(
+                        name=name,
+                        shared=shared,
+                        entries=entries,
+                        width=x2 - x1,
+                        height=y2 - y1,
+                        resources=resources[id(appearance_resources)],
+                        font_name=form_font_names[form_font_name[1:]],
+                        form_font_name=form_font_name[1:],
+                        font_size=float(font_size) if "." in font_size else int(font_size),
+                        text_fill=" ".join(text_fill),
+                        multiline=bool(int(field.Ff or 0) & 4096),
+                        alignment=int(annotation.Q or field.Q or 0),
+                    )
+                )
+            self.pages.append((page_entries, widgets))
+
+        acroform = pdf.Root.AcroForm
+        self.acroform_entries = " ".join(f"{key} {writer.format(value)}" for key, value in acroform.iteritems() if key != PdfName.Fields)
+        self.info_entries = " ".join(f"{key} {writer.format(value)}" for key, value in pdf.Info.iteritems()) if pdf.Info is not None else None
+        self.start = writer.snapshot()
+
+    def fill(self, output: str | BinaryIO, values: dict[str, str]) -> int:
+        """Write the template with the given field values, by field name. Fields without a value are left empty.
+
+        Returns:
+            int: Number of bytes written.
+
+        """
+        writer = IncrementalPdfWriter(output, start=self.start)
+        writer.acroform_entries = self.acroform_entries
+        writer.info_entries = self.info_entries
+        try:
+            for name, entries in self.shared_fields.items():
+                value = PdfString.from_unicode(values.get(name, ""))
+                number = writer.reserve()
+                writer.shared_fields[name] = (number, f"{entries} /V {value} /DV {value}", [])
+                writer.field_numbers.append(number)
+
+            # Fields showing the same value in boxes of the same size share their appearance, as they do in rendered reports
+            appearances: dict[tuple, int] = {}
+            for page_entries, widgets in self.pages:
+                page_number = writer.reserve()
+                annotations = []
+                for widget in widgets:
+                    value = values.get(widget.name, "")
+
+                    appearance_key = (value, widget.width, widget.height, widget.resources, widget.font_size, widget.multiline, widget.alignment)
+                    if appearance_key not in appearances:
+                        stream = field_appearance(
+                            value,
+                            widget.width,
+                            widget.height,
+                            widget.font_name,
+                            widget.form_font_name,
+                            widget.font_size,
+                            widget.text_fill,
+                            widget.multiline,
+                            widget.alignment,
+                        )
+                        appearances[appearance_key] = writer.reserve()
+                        writer.write_object(
+                            appearances[appearance_key],
+                            f"<</Type /XObject /Subtype /Form /FormType 1 /BBox [0 0 {widget.width:g} {widget.height:g}] /Matrix [1 0 0 1 0 0] "
+                            f"/Resources {widget.resources} /Length {len(stream)}>>\nstream\n{stream}\nendstream",
+                        )
+
+                    number = writer.reserve()
+                    body = f"{widget.entries} /P {page_number} 0 R /AP <</N {appearances[appearance_key]} 0 R>>"
+                    if widget.shared:
+                        parent_number, _, kids = writer.shared_fields[widget.name]
+                        body += f" /Parent {parent_number} 0 R"
+                        kids.append(number)
+                    else:
+                        pdf_value = PdfString.from_unicode(value)
+                        body += f" /V {pdf_value} /DV {pdf_value}"
+                        writer.field_numbers.append(number)
+                    writer.write_object(number, f"<<{body}>>")
+                    annotations.append(f"{number} 0 R")
+
+                writer.write_object(page_number, f"<<{page_entries} /Parent {writer.pages_number} 0 R /Annots [{' '.join(annotations)}]>>")
+                writer.page_numbers.append(page_number)
+
+            return writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+
+
+def layout_key(wagon_count: int, dict_treated_values: dict, header_layout: HeaderLayout, repeat_header: bool) -> tuple:
+    """Everything the layout of a report depends on: the number of wagons, the header geometry and whether the header repeats."""
+    header_boxes = tuple((field["x"], field["y"], field["width"], field["height"]) for field in header_layout.text_fields)
+    sum_count = len(list_mass_keys) if dict_treated_values["Sum_masses"] is None else len(dict_treated_values["Sum_masses"])
+    return wagon_count, sum_count, header_layout.height, header_boxes, repeat_header
+
+
+def report_field_values(wagons: list[dict], dict_treated_values: dict, header_layout: HeaderLayout) -> dict[str, str]:
+    """Value of every field of a report, by field name. The names and values are the ones given to the fields by _create_report."""
+    values = {field["name"]: field["value"] for field in plan_page_layout(dict_treated_values, header_layout).text_fields}
+
+    count_item = 0
+    for idx, wagon in enumerate(wagons):
+        for col_name in dict_col_params:
+            values[f"to_be_centered_{count_item}"] = f"{idx + 1 if col_name == 'No.' else wagon[col_name]}"
+            count_item += 1
+
+    masses = dict_treated_values["Sum_masses"]
+    if masses is None:
+        masses = mass_totals(wagons)
+    for col_value in ["Sum:"] + masses:
+        values[f"to_be_centered_{count_item}"] = col_value.replace("<br/>", "\n")
+        count_item += 1
+    return values
+
+
+class ReportTemplateCache:
+    """Templates of the reports created so far, by layout, so that similar reports are filled in instead of drawn.
+
+    The first report of a layout is rendered as usual and kept as a template. Every later report with the same number of wagons,
+    the same header geometry and the same repeat_header setting is written by filling its values into the template.
+
+    Args:
+        max_templates (int, optional): Number of templates kept. The least recently used one is dropped when there are more.
+    """
+
+    def __init__(self, max_templates: int = 16) -> None:
+        self.max_templates = max_templates
+        self.templates: OrderedDict[tuple, ReportTemplate] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def create_report(
+        self,
+        filename: str | BinaryIO,
+        wagon_values: Iterable[dict] | Mapping[str, Sequence] | np.ndarray | int,
+        info_values: dict,
+        repeat_header: bool = True,
+    ) -> int:
+        """Create a report like create_report, from a cached template when one matches its layout."""
+        filename = report_filename(filename)
+        wagons = wagon_sequence(wagon_values)
+        if wagons is None:
+            return 0
+
+        dict_treated_values = get_treated_values(info_values)
+        header_layout = plan_header_layout(dict_treated_values)
+        key = layout_key(len(wagons), dict_treated_values, header_layout, repeat_header)
+
+        template = self.templates.get(key)
+        if template is not None:
+            self.hits += 1
+            self.templates.move_to_end(key)
+            template.fill(filename, report_field_values(wagons, dict_treated_values, header_layout))
+            if isinstance(filename, str):
+                logging.info(f"File created: {filename}")
+            return 1
+
+        self.misses += 1
+        buffer = io.BytesIO()
+        if not create_report(buffer, wagons, info_values, repeat_header):
+            return 0
+        self.templates[key] = ReportTemplate(buffer.getvalue())
+        if len(self.templates) > self.max_templates:
+            self.templates.popitem(last=False)
+
+        write_report(filename, buffer.getvalue())
+        return 1
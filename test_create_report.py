@@ -0,0 +1,89 @@
+import io
+from functools import lru_cache
+
+import pytest
+from pdfrw import PdfReader
+
+from create_report import create_report, create_report_bytes
+from page_cache import PageCache
+from report_template import ReportTemplateCache
+from test_values import info_values, wagon_values
+
+wagon_counts = [1, 14, 60, 300]
+
+
+def make_wagons(count: int) -> list[dict]:
+    return [dict(wagon_values[idx % len(wagon_values)], Wagen=f"31 80 4556 {idx:03d}-4") for idx in range(count)]
+
+
+def form_fields(pdf_data: bytes) -> list[list[tuple[str, str]]]:
+    """Per page the names and values of its form fields."""
+    pages = []
+    for page in PdfReader(fdata=pdf_data).pages:
+        fields = []
+        for annotation in page.Annots or []:
+            field = annotation if annotation.T is not None else annotation.Parent
+            value = annotation.V if annotation.V is not None else field.V
+            fields.append((field.T.to_unicode(), value.to_unicode() if value is not None else ""))
+        pages.append(sorted(fields))
+    return pages
+
+
+@lru_cache
+def serial_fields(count: int) -> list[list[tuple[str, str]]]:
+    return form_fields(create_report_bytes(make_wagons(count), info_values))
+
+
+def render(count: int, **kwargs) -> bytes:
+    buffer = io.BytesIO()
+    assert create_report(buffer, make_wagons(count), info_values, **kwargs)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("count", wagon_counts)
+def test_flush_pages_matches_serial(count):
+    assert form_fields(render(count, flush_pages=True)) == serial_fields(count)
+
+
+@pytest.mark.parametrize("count", wagon_counts)
+def test_workers_match_serial(count):
+    assert form_fields(render(count, workers=2)) == serial_fields(count)
+
+
+@pytest.mark.parametrize("count", wagon_counts)
+def test_page_cache_matches_serial(count):
+    cache = PageCache()
+    wagons = make_wagons(count)
+    assert cache.create_report(io.BytesIO(), wagons, info_values)
+
+    # A corrected wagon renders its page again and takes the other pages from the cache
+    wagons[-1]["NettoMasse"] = "1 234"
+    buffer = io.BytesIO()
+    assert cache.create_report(buffer, wagons, info_values)
+    assert form_fields(buffer.getvalue()) == form_fields(create_report_bytes(wagons, info_values))
+
+
+@pytest.mark.parametrize("count", wagon_counts)
+def test_template_cache_matches_serial(count):
+    cache = ReportTemplateCache()
+    assert cache.create_report(io.BytesIO(), make_wagons(count), info_values)
+
+    # Another report of the same layout is filled into the template
+    wagons = make_wagons(count)[::-1]
+    buffer = io.BytesIO()
+    assert cache.create_report(buffer, wagons, info_values)
+    assert cache.hits == 1
+    assert form_fields(buffer.getvalue()) == form_fields(create_report_bytes(wagons, info_values))
+
+
+@pytest.mark.parametrize("mode", [{"flush_pages": True}, {"workers": 2}])
+def test_failed_report_leaves_previous_file(tmp_path, mode):
+    wagons = make_wagons(60)
+    del wagons[-1]["NHM"]
+    path = tmp_path / "report.pdf"
+    path.write_bytes(b"previous")
+
+    with pytest.raises(KeyError):
+        create_report(str(path), wagons, info_values, **mode)
+    assert path.read_bytes() == b"previous"
+    assert [file.name for file in tmp_path.iterdir()] == ["report.pdf"]
@@ -0,0 +1,66 @@
+from functools import lru_cache
+from typing import NamedTuple
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Paragraph
+
+from global_vars import paragraph_styles, text_line_spacing, text_measure_cache_size
+
+
+class TextMetrics(NamedTuple):
+    lines: int
+    height: float
+
+
+def _plain_text_lines(text: str, width: float, style) -> int | None:
+    """Count the lines of plain text with the same greedy word wrapping as Paragraph, using only font metrics.
+
+    Returns None when the text needs the full paragraph machinery (markup, entities, irregular whitespace or words wider than the box).
+    """
+    if "<" in text or "&" in text or "\xad" in text or " ".join(text.split()) != text:
+        return None
+
+    space_width = stringWidth(" ", style.fontName, style.fontSize)
+    lines = 0
+    line_width = 0.0
+    line_words = 0
+    for word in text.split():
+        word_width = stringWidth(word, style.fontName, style.fontSize)
+        if word_width > width:
+            return None
+        # Paragraph lets the spaces of a line shrink a little before breaking it
+        if line_words and line_width + space_width + word_width <= width + style.spaceShrinkage * space_width * line_words:
+            line_width += space_width + word_width
+            line_words += 1
+        else:
+            lines += 1
+            line_width = word_width
+            line_words = 1
+    return lines
+
+
+@lru_cache(maxsize=text_measure_cache_size)
+def measure_text(text: str, width: float, style_name: str = "header_1_value") -> TextMetrics:
+    """Measure the lines and the height needed by a text wrapped in a box of the given width.
+
+    Results are cached, so texts repeated across pages and reports (station names, addresses) are measured only once.
+
+    Args:
+        text (str): Text of the paragraph, may contain paragraph markup such as <br/>.
+        width (float): Available width of the box.
+        style_name (str, optional): Name of the style in paragraph_styles.
+
+    Returns:
+        TextMetrics: Number of lines (at least one) and the height of the box holding them.
+
+    """
+    style = paragraph_styles[style_name]
+
+    lines = _plain_text_lines(text, width, style)
+    if lines is None:
+        p = Paragraph(text, style=style)
+        p.wrap(width, 1e6)
+        lines = len(p.getActualLineWidths0())
+
+    lines = max(1, lines)
+    return TextMetrics(lines, text_line_spacing * style.fontSize * lines)
@@ -1,7 +1,12 @@
+from reportlab.lib.colors import opaqueColor
+from reportlab.lib.rl_accel import fp_str
+from reportlab.pdfbase.acroform import AcroForm, PDFFromString, escPDF
+from reportlab.pdfbase.pdfdoc import PDFArray, PDFDictionary
+from reportlab.pdfbase.pdfmetrics import getAscentDescent, stringWidth
 from reportlab.pdfgen import canvas
-from reportlab.platypus import Frame
+from reportlab.platypus import Flowable, Frame, Paragraph
 
-from global_vars import A4_height
+from global_vars import A4_height, field_text_padding
 
 
 def create_line(canvas, start_x, end_x, start_y, end_y, color, width):
@@ -33,23 +38,23 @@ def draw_rectangle(
 
 
 class FrameContainer:
+    """Absolute position of a frame on the page.
+
+    Most frames are only used to hold coordinates, so the reportlab Frame is created lazily the first time content is flowed into it.
+    """
+
+    __slots__ = ("_frame", "_frame_kwargs", "end_x", "end_y", "height", "start_x", "start_y", "width")
+
     def __init__(self, canvas, start_x, end_x, start_y, end_y, stroke_color, stroke_width, fill=0, **kwargs) -> None:
         self.start_x = start_x
         self.end_x = end_x
         self.start_y = start_y
         self.end_y = end_y
-        self.center_x = (start_x + end_x) / 2
-        self.center_y = (start_y + end_y) / 2
         self.width = abs(end_x - start_x)
         self.height = abs(end_y - start_y)
 
-        self.frame = Frame(
-            start_x,
-            start_y,
-            abs(end_x - start_x),
-            abs(end_y - start_y),
-            **kwargs,
-        )
+        self._frame = None
+        self._frame_kwargs = kwargs
 
         if (fill > 0) or (stroke_width > 0):
             draw_rectangle(
@@ -63,8 +68,30 @@ class FrameContainer:
                 fill,
             )
 
+    @property
+    def center_x(self):
+        return (self.start_x + self.end_x) / 2
+
+    @property
+    def center_y(self):
+        return (self.start_y + self.end_y) / 2
+
+    @property
+    def frame(self) -> Frame:
+        if self._frame is None:
+            self._frame = Frame(
+                self.start_x,
+                self.start_y,
+                self.width,
+                self.height,
+                **self._frame_kwargs,
+            )
+        return self._frame
+
 
 class FrameComposite:
+    __slots__ = ("canvas", "end_x", "end_y", "frame_container", "offset_x", "offset_y", "start_x", "start_y")
+
     def __init__(
         self,
         canvas: canvas.Canvas,
@@ -88,7 +115,6 @@ class FrameComposite:
         self.offset_x = offset_x
         self.offset_y = offset_y
 
-        self.text_fields = []
         self.canvas = canvas
         self.frame_container = FrameContainer(
             canvas,
@@ -120,19 +146,16 @@ class FrameComposite:
 
 
 class LineFrame:
+    __slots__ = ("_frame", "_frame_kwargs", "end_x", "end_y", "start_x", "start_y")
+
     def __init__(self, canvas, start_x, end_x, start_y, end_y, stroke_color, stroke_width, fill=0, **kwargs) -> None:
         self.start_x = start_x
         self.end_x = end_x
         self.start_y = start_y
         self.end_y = end_y
 
-        self.frame = Frame(
-            start_x,
-            start_y,
-            abs(end_x - start_x),
-            abs(end_y - start_y),
-            **kwargs,
-        )
+        self._frame = None
+        self._frame_kwargs = kwargs
 
         if (fill > 0) or (stroke_width > 0):
             draw_rectangle(
@@ -146,6 +169,18 @@ class LineFrame:
                 fill,
             )
 
+    @property
+    def frame(self) -> Frame:
+        if self._frame is None:
+            self._frame = Frame(
+                self.start_x,
+                self.start_y,
+                abs(self.end_x - self.start_x),
+                abs(self.end_y - self.start_y),
+                **self._frame_kwargs,
+            )
+        return self._frame
+
 
 def create_matrix(canvas: canvas.Canvas, frame: FrameComposite, list_positions: list, params) -> list[FrameComposite]:
     frame_width = abs(frame.frame_container.end_x - frame.frame_container.start_x)
@@ -163,3 +198,273 @@ def create_matrix(canvas: canvas.Canvas, frame: FrameComposite, list_positions:
         list_frames.append(frame_iter)
 
     return list_frames
+
+
+class _PlacedParagraph(Flowable):
+    """Proxy flowable that lets a Frame position a paragraph and records where it would be drawn."""
+
+    def __init__(self, paragraph: Paragraph, operations: list) -> None:
+        self.paragraph = paragraph
+        self.operations = operations
+
+    def wrap(self, available_width, available_height):
+        return self.paragraph.wrap(available_width, available_height)
+
+    def getSpaceBefore(self):
+        return self.paragraph.getSpaceBefore()
+
+    def getSpaceAfter(self):
+        return self.paragraph.getSpaceAfter()
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        self.operations.append(("drawParagraph", (self.paragraph, x, y), {"_sW": _sW}))
+
+
+class CanvasRecorder:
+    """Stand-in for a canvas that records the drawing operations of frames and paragraphs.
+
+    The layout is computed once against the recorder and then replayed on any number of pages, so the geometry and the
+    paragraph wrapping are not recomputed for every page.
+    """
+
+    def __init__(self) -> None:
+        self.operations = []
+
+    def _record(self, name, *args, **kwargs):
+        self.operations.append((name, args, kwargs))
+
+    def setStrokeColor(self, *args, **kwargs):
+        self._record("setStrokeColor", *args, **kwargs)
+
+    def setStrokeColorRGB(self, *args, **kwargs):
+        self._record("setStrokeColorRGB", *args, **kwargs)
+
+    def setLineWidth(self, *args, **kwargs):
+        self._record("setLineWidth", *args, **kwargs)
+
+    def setDash(self, *args, **kwargs):
+        self._record("setDash", *args, **kwargs)
+
+    def rect(self, *args, **kwargs):
+        self._record("rect", *args, **kwargs)
+
+    def line(self, *args, **kwargs):
+        self._record("line", *args, **kwargs)
+
+    def count(self, name: str) -> int:
+        """Number of recorded operations with the given name, e.g. "rect" for the frame borders or "drawParagraph"."""
+        return sum(1 for operation in self.operations if operation[0] == name)
+
+    def add_paragraphs(self, frame: Frame, paragraphs: list[Paragraph]) -> None:
+        frame.addFromList([_PlacedParagraph(paragraph, self.operations) for paragraph in paragraphs], self)
+
+    def replay(self, canvas: canvas.Canvas) -> None:
+        for name, args, kwargs in self.operations:
+            if name == "drawParagraph":
+                paragraph, x, y = args
+                paragraph.drawOn(canvas, x, y, **kwargs)
+            else:
+                getattr(canvas, name)(*args, **kwargs)
+
+
+def wrap_field_line(line: str, width: float, fontName: str, fontSize: int) -> list[str]:
+    """Break a line of a multiline field at word boundaries so every piece fits the width. Words wider than the field stay whole."""
+    space_width = stringWidth(" ", fontName, fontSize)
+    lines = []
+    words = []
+    words_width = 0.0
+    for word in line.split(" "):
+        word_width = stringWidth(word, fontName, fontSize)
+        if words and words_width + space_width + word_width > width:
+            lines.append(" ".join(words))
+            words = []
+        words_width = words_width + space_width + word_width if words else word_width
+        words.append(word)
+    lines.append(" ".join(words))
+    return lines
+
+
+def layout_field_text(
+    value: str,
+    width: float,
+    height: float,
+    fontName: str,
+    fontSize: int,
+    multiline: bool = False,
+    alignment: int = 0,
+) -> list[tuple[float, float, str]]:
+    """Position the lines of a text field value inside the field box, the way viewers lay out field values.
+
+    Lines are inset by the field padding and aligned left, centered or right. A single line value is centered vertically, a multiline
+    value starts at the top of the box and its lines are wrapped at the width of the box.
+
+    Returns:
+        list[tuple[float, float, str]]: Start x, baseline y (relative to the bottom left corner of the box) and text of every line.
+
+    """
+    ascent, descent = getAscentDescent(fontName, fontSize)
+    if multiline:
+        baseline = height - field_text_padding - ascent
+    else:
+        baseline = (height - ascent + descent) / 2 - descent
+
+    text_lines = value.split("\n")
+    if multiline:
+        text_lines = [wrapped for line in text_lines for wrapped in wrap_field_line(line, width - 2 * field_text_padding, fontName, fontSize)]
+
+    lines = []
+    for line in text_lines:
+        if alignment == 1:
+            start_x = (width - stringWidth(line, fontName, fontSize)) / 2
+        elif alignment == 2:
+            start_x = width - field_text_padding - stringWidth(line, fontName, fontSize)
+        else:
+            start_x = field_text_padding
+        lines.append((start_x, baseline, line))
+        baseline -= 1.2 * fontSize
+    return lines
+
+
+def field_appearance(
+    value: str,
+    width: float,
+    height: float,
+    fontName: str,
+    iFontName: str,
+    fontSize: int,
+    text_fill: str = "0 g",
+    multiline: bool = False,
+    alignment: int = 0,
+) -> str:
+    """Content of the normal appearance stream of a text field, drawn with the form font iFontName (e.g. "Helv" for Helvetica)."""
+    stream = [f"/Tx BMC\nq\n0 0 {fp_str(width)} {fp_str(height)} re\nW\nn"]
+    if value:
+        stream.append(f"BT\n/{iFontName} {fontSize} Tf\n{text_fill}")
+        for start_x, baseline, line in layout_field_text(value, width, height, fontName, fontSize, multiline, alignment):
+            stream.append(f"1 0 0 1 {fp_str(start_x)} {fp_str(baseline)} Tm\n({escPDF(line)}) Tj")
+        stream.append("ET")
+    stream.append("Q\nEMC\n")
+    return "\n".join(stream)
+
+
+# Entries of a text field that belong to the field itself rather than to one of its widgets
+field_keys = ("FT", "T", "V", "DV", "Ff", "MaxLen", "TU")
+
+
+class AlignedAcroForm(AcroForm):
+    """AcroForm whose text fields take an alignment (0 left, 1 center, 2 right).
+
+    The alignment (/Q) is written with the field and the appearance stream (/AP) of every text field is generated here with the same
+    layout a viewer would use, so viewers do not have to regenerate the field appearances when the file is opened. Fields repeated on
+    every page can be shared: one field with a widget per page, so editing it on one page changes it everywhere.
+    """
+
+    def __init__(self, canv, **kwds) -> None:
+        super().__init__(canv, **kwds)
+        self._text_layout = None
+        self._font_refs = {}
+        self._shared_fields = {}
+
+    def makeFont(self, fontName):
+        # reportlab writes a new font dictionary for every field, one per font is enough
+        if fontName not in self._font_refs:
+            self._font_refs[fontName] = super().makeFont(fontName)
+        return self._font_refs[fontName]
+
+    def textfield(self, alignment: int = 0, shared: bool = False, **kwargs) -> None:
+        """Add a text field. With shared, every call with the same name adds a widget of a single field instead of a new field."""
+        self._text_layout = (kwargs.get("fontName") or "Helvetica", "multiline" in kwargs.get("fieldFlags", ""), alignment)
+        try:
+            super().textfield(**kwargs)
+        finally:
+            self._text_layout = None
+
+        widget_ref = self.fields[-1]
+        widget = self.canv._doc.idToObject[widget_ref.name].dict
+        if alignment:
+            widget["Q"] = alignment
+        if not shared:
+            return
+
+        # Split the field from its widget: the field is created once and every widget of the same name becomes one of its kids
+        self.fields.pop()
+        parent_ref = self._shared_fields.get(kwargs.get("name"))
+        if parent_ref is None:
+            parent = {key: widget[key] for key in (*field_keys, "DA", "Q") if key in widget}
+            parent["Kids"] = PDFArray([])
+            parent_ref = self._shared_fields[kwargs.get("name")] = self.getRef(PDFDictionary(parent))
+            self.fields.append(parent_ref)
+        for key in field_keys:
+            widget.pop(key, None)
+        widget["Parent"] = parent_ref
+        self.canv._doc.idToObject[parent_ref.name].dict["Kids"].sequence.append(widget_ref)
+
+    def txAP(self, key, value, iFontName, rFontName, fontSize, fillColor=None, borderWidth=1, textColor=None, width=120, height=36, **kwargs):
+        # Only plain text fields without a border or background are laid out here, anything else keeps the reportlab appearance
+        if self._text_layout is None or borderWidth or opaqueColor(fillColor):
+            return super().txAP(
+                key,
+                value,
+                iFontName,
+                rFontName,
+                fontSize,
+                fillColor=fillColor,
+                borderWidth=borderWidth,
+                textColor=textColor,
+                width=width,
+                height=height,
+                **kwargs,
+            )
+
+        fontName, multiline, alignment = self._text_layout
+        return self.makeStream(
+            width,
+            height,
+            field_appearance(value, width, height, fontName, iFontName, fontSize, self.streamFillColor(textColor), multiline, alignment),
+            Resources=PDFFromString(f"<< /ProcSet [/PDF /Text] /Font {rFontName} >>"),
+        )
+
+
+def install_acroform(canvas: canvas.Canvas) -> AlignedAcroForm:
+    """Give the canvas an AlignedAcroForm, it is then returned by canvas.acroForm."""
+    canvas._doc._catalog.AcroForm = canvas.AcroForm = AlignedAcroForm(canvas)
+    return canvas.AcroForm
+
+
+def draw_field_text(
+    canvas: canvas.Canvas,
+    value: str,
+    x: float,
+    y: float,
+    width: float,
+    height: float,
+    fontName: str = "Helvetica",
+    fontSize: int = 12,
+    fieldFlags: str = "",
+    alignment: int = 0,
+    **kwargs,
+) -> None:
+    """Draw the value of a text field as plain page text instead of a form field.
+
+    The text is clipped to the field box and laid out like the field appearance. Arguments that only make sense for a form field
+    (name, colors) are ignored.
+    """
+    if not value:
+        return
+
+    canvas.saveState()
+    clip = canvas.beginPath()
+    clip.rect(x, y, width, height)
+    canvas.clipPath(clip, stroke=0, fill=0)
+    canvas.setFont(fontName, fontSize)
+    for start_x, baseline, line in layout_field_text(value, width, height, fontName, fontSize, "multiline" in fieldFlags, alignment):
+        canvas.drawString(x + start_x, y + baseline, line)
+    canvas.restoreState()
+
+
+def add_text_field(canvas: canvas.Canvas, fillable: bool = True, **kwargs) -> None:
+    """Add a form text field to the page, or draw its value as plain text when the report is not fillable."""
+    if fillable:
+        canvas.acroForm.textfield(**kwargs)
+    else:
+        draw_field_text(canvas, **kwargs)
@@ -0,0 +1,148 @@
+import json
+import logging
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+
+import numpy as np
+
+from global_vars import dict_col_params, list_mass_keys, list_wagon_necessary_keys
+
+# Kinds of NumPy columns accepted for the masses: strings like "68 500" and integers. Floats would be printed with a decimal point
+mass_column_kinds = "USOiu"
+
+
+class WagonRow:
+    """One wagon of a WagonColumns, read from the columns by index when a value is asked for."""
+
+    __slots__ = ("columns", "idx")
+
+    def __init__(self, columns: dict[str, Sequence], idx: int) -> None:
+        self.columns = columns
+        self.idx = idx
+
+    def __getitem__(self, key: str):
+        return self.columns[key][self.idx]
+
+
+class WagonColumns(Sequence):
+    """Wagons given column by column, e.g. straight from a columnar data source, without building a dict per wagon.
+
+    Behaves like a list of wagons: its items are WagonRow that read their values from the columns, and slices share the columns.
+    Create it with wagon_columns, which checks the columns once.
+    """
+
+    __slots__ = ("columns", "start", "stop")
+
+    def __init__(self, columns: dict[str, Sequence], start: int = 0, stop: int | None = None) -> None:
+        self.columns = columns
+        self.start = start
+        self.stop = len(columns[list_wagon_necessary_keys[0]]) if stop is None else stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, idx):
+        wagon_range = range(self.start, self.stop)[idx]
+        if isinstance(idx, slice):
+            if wagon_range.step != 1:
+                return [WagonRow(self.columns, row_idx) for row_idx in wagon_range]
+            return WagonColumns(self.columns, wagon_range.start, wagon_range.stop)
+        return WagonRow(self.columns, wagon_range)
+
+    def __iter__(self) -> Iterator[WagonRow]:
+        return (WagonRow(self.columns, idx) for idx in range(self.start, self.stop))
+
+    def __reduce__(self):
+        # Sent to other processes with the rows of the range only
+        return WagonColumns, ({key: self.columns[key][self.start : self.stop] for key in list_wagon_necessary_keys},)
+
+    def mass_rows(self) -> np.ndarray:
+        """Values of list_mass_keys of the wagons as a table of strings, taken from the columns without going through the rows."""
+        masses = [np.asarray(self.columns[key][self.start : self.stop]) for key in list_mass_keys]
+        return np.stack([column.astype(str) for column in masses], axis=1)
+
+
+def is_columnar(wagon_values) -> bool:
+    """Whether wagon values are given as columns: a dict of sequences or a NumPy structured array."""
+    return isinstance(wagon_values, Mapping) or (isinstance(wagon_values, np.ndarray) and wagon_values.dtype.names is not None)
+
+
+def wagon_columns(wagon_values: Mapping[str, Sequence] | np.ndarray) -> WagonColumns | None:
+    """Check wagons given column by column and make them readable by index.
+
+    Every column is checked once, before anything is rendered, instead of failing in the middle of the report.
+
+    Args:
+        wagon_values (Mapping[str, Sequence] | np.ndarray): A dict with a sequence of values (list, tuple or NumPy array) for every key
+            of list_wagon_necessary_keys, or a NumPy structured or record array with fields of these names. All columns must have
+            the same length. Further columns are ignored.
+
+    Returns:
+        WagonColumns | None: The wagons, or None when the columns are not valid. The reason is logged.
+
+    """
+    if isinstance(wagon_values, np.ndarray):
+        if wagon_values.ndim != 1:
+            logging.error(f"Wagon array must have one dimension, got shape {wagon_values.shape}")
+            return None
+        names = wagon_values.dtype.names
+        wagon_values = {name: wagon_values[name] for name in names}
+
+    missing = [key for key in list_wagon_necessary_keys if key not in wagon_values]
+    if missing:
+        logging.error(f"Wagon columns missing: {', '.join(missing)}")
+        return None
+
+    columns = {}
+    for key in list_wagon_necessary_keys:
+        column = wagon_values[key]
+        if isinstance(column, np.ndarray):
+            if column.ndim != 1:
+                logging.error(f"Wagon column {key} must have one dimension, got shape {column.shape}")
+                return None
+            if key in list_mass_keys and column.dtype.kind not in mass_column_kinds:
+                logging.error(f"Wagon column {key} must hold strings or integers, got {column.dtype}")
+                return None
+            if column.dtype.kind == "S":
+                column = np.char.decode(column, "utf-8")
+        elif isinstance(column, str | bytes) or not isinstance(column, Iterable):
+            logging.error(f"Wagon column {key} must be a sequence of values, got {type(column).__name__}")
+            return None
+        elif not isinstance(column, list | tuple):
+            # e.g. a pandas Series, read by position afterwards
+            column = np.asarray(column)
+        columns[key] = column
+
+    lengths = {key: len(column) for key, column in columns.items()}
+    if len(set(lengths.values())) > 1:
+        logging.error(f"Wagon columns must have the same length, got {', '.join(f'{key}: {length}' for key, length in lengths.items())}")
+        return None
+    return WagonColumns(columns)
+
+
+def update_row_digest(digest, wagons: Iterable) -> None:
+    """Add the text of the table cells of the wagons to a hashlib digest, so that wagons that give the same rows give the same digest."""
+    columns = [col_name for col_name in dict_col_params if col_name != "No."]
+    for wagon in wagons:
+        digest.update(json.dumps([f"{wagon[col_name]}" for col_name in columns], ensure_ascii=False).encode())
+
+
+def wagon_sequence(wagon_values: Iterable[dict] | Mapping[str, Sequence] | np.ndarray | int) -> Sequence | None:
+    """Wagons of any input accepted by create_report as a sequence.
+
+    None when there are no wagons or the columns given are not valid, see wagon_columns. The reason is logged.
+    """
+    if isinstance(wagon_values, int):
+        wagons = [{key: "" for key in list_wagon_necessary_keys}] * wagon_values
+    elif is_columnar(wagon_values):
+        wagons = wagon_columns(wagon_values)
+        if wagons is None:
+            return None
+    elif isinstance(wagon_values, Sequence):
+        wagons = wagon_values
+    else:
+        wagons = list(wagon_values)
+
+    if not wagons:
+        logging.error("No wagons to create the report")
+        return None
+    return wagons